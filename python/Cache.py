@@ -0,0 +1,248 @@
+import hashlib
+import os
+import pickle
+import struct
+import tempfile
+import time
+from types import ModuleType
+from typing import Iterable, List, Optional, Tuple
+
+from Input import open_input
+
+# Where the cache lives unless a directory is passed in, and its default size limit
+DIR_ENV_VAR = 'AOC_CACHE_DIR'
+DEFAULT_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'adventofcode2024')
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+MAGIC = b'AOC1'
+HEADER = struct.Struct('<4sIQ')
+LENGTH = struct.Struct('<Q')
+SUFFIX = '.pkl'
+TEMP_PREFIX = '.tmp-'
+# Writes after which a process rescans the directory even if its own size estimate is below
+# the limit, to pick up what other processes have written since its last scan
+RESCAN_INTERVAL = 64
+# Eviction trims the cache to this fraction of its limit, so a full cache is not rescanned on every write
+TRIM_FRACTION = 0.9
+# Temporary files older than this were left behind by a crashed writer
+STALE_TEMP_SECONDS = 3600
+
+def content_hash(filename: str) -> str:
+    """
+    Hash the contents of a file, reading it through a memory map.
+
+    Parameters:
+        filename (str): The path to the file.
+
+    Returns:
+        str: The SHA-256 hex digest of the contents.
+    """
+    with open_input(filename) as data:
+        return hashlib.sha256(data).hexdigest()
+
+def solver_version(*modules: ModuleType) -> str:
+    """
+    Derive a version string from the source code of the modules that produce a cached value.
+
+    Any edit to a solver or its parser changes the version, so stale entries are never read back.
+
+    Parameters:
+        *modules (ModuleType): The modules involved, e.g. a day module and Input.
+
+    Returns:
+        str: A short hex digest of their sources.
+    """
+    digest = hashlib.sha256()
+    for module in modules:
+        with open(module.__file__, 'rb') as file:
+            digest.update(file.read())
+    return digest.hexdigest()[:16]
+
+def dump(value: object) -> bytes:
+    """
+    Serialise a value with pickle protocol 5, keeping large buffers such as arrays out of band.
+
+    The layout is a header with the buffer count and pickle length, then the buffer lengths,
+    the pickle stream, and the raw buffers one after another.
+
+    Parameters:
+        value (object): The value to serialise.
+
+    Returns:
+        bytes: The serialised value.
+    """
+    buffers: List[pickle.PickleBuffer] = []
+    stream = pickle.dumps(value, protocol=5, buffer_callback=buffers.append)
+    raw = [buffer.raw() for buffer in buffers]
+    parts = [HEADER.pack(MAGIC, len(raw), len(stream))]
+    parts.extend(LENGTH.pack(len(buffer)) for buffer in raw)
+    parts.append(stream)
+    parts.extend(raw)
+    return b''.join(parts)
+
+def load(data: bytearray) -> object:
+    """
+    Deserialise a value written by dump.
+
+    Out-of-band buffers are handed to pickle as views into data, so arrays are rebuilt without copying.
+
+    Parameters:
+        data (bytearray): The serialised value.
+
+    Returns:
+        object: The value.
+
+    Raises:
+        ValueError: If data is not in the format written by dump.
+    """
+    view = memoryview(data)
+    magic, count, stream_length = HEADER.unpack_from(view)
+    if magic != MAGIC:
+        raise ValueError("Not a cache entry")
+    offset = HEADER.size
+    lengths = [LENGTH.unpack_from(view, offset + i * LENGTH.size)[0] for i in range(count)]
+    offset += count * LENGTH.size
+
+    stream = view[offset:offset + stream_length]
+    offset += stream_length
+    buffers = []
+    for length in lengths:
+        buffers.append(view[offset:offset + length])
+        offset += length
+    return pickle.loads(stream, buffers=buffers)
+
+class DiskCache:
+    """
+    Size-bounded on-disk cache shared by any number of processes.
+
+    Each entry is one file, written to a temporary name and renamed into place, so readers
+    only ever see complete entries and no locking is needed. A hit touches the file's
+    modification time, and eviction deletes the least recently used files first once the
+    cache grows past its limit. An entry deleted by another process in the meantime is simply
+    a miss.
+
+    Scanning the directory costs a stat call per entry, so a write does not scan it. Instead
+    each instance adds the sizes it writes to the total found by its last scan, and only
+    rescans once that estimate passes the limit or RESCAN_INTERVAL writes have gone by. The
+    cache can therefore overshoot its limit by what other processes wrote since then. Once over
+    the limit it is trimmed to TRIM_FRACTION of it, leaving room for writes before the next scan.
+    """
+
+    def __init__(self, directory: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Parameters:
+            directory (Optional[str]): The cache directory; defaults to $AOC_CACHE_DIR or ~/.cache/adventofcode2024.
+            max_bytes (int): The total size past which least recently used entries are evicted.
+        """
+        self.directory = directory or os.environ.get(DIR_ENV_VAR) or DEFAULT_DIR
+        self.max_bytes = max_bytes
+        os.makedirs(self.directory, exist_ok=True)
+        # The cache's size as of the last scan plus what this instance wrote since, or None before the first scan
+        self.size_estimate: Optional[int] = None
+        self.writes_since_scan = 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + SUFFIX)
+
+    def get(self, key: str) -> Tuple[bool, object]:
+        """
+        Look up an entry and mark it as recently used.
+
+        Parameters:
+            key (str): The entry's key.
+
+        Returns:
+            Tuple[bool,object]: Whether the entry was found, and its value (None if not found).
+        """
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as file:
+                data = bytearray(os.fstat(file.fileno()).st_size)
+                file.readinto(data)
+            value = load(data)
+        except FileNotFoundError:
+            return False, None
+        except (ValueError, EOFError, struct.error, pickle.UnpicklingError):
+            # A corrupt or foreign file; drop it and treat it as a miss
+            self._remove(path)
+            return False, None
+
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return True, value
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Store an entry, replacing any previous value, and evict entries if the cache looks too big.
+
+        Parameters:
+            key (str): The entry's key.
+            value (object): The value to store; anything pickle can handle.
+        """
+        data = dump(value)
+        descriptor, temp_path = tempfile.mkstemp(prefix=TEMP_PREFIX, dir=self.directory)
+        try:
+            with os.fdopen(descriptor, 'wb') as file:
+                file.write(data)
+            os.replace(temp_path, self._path(key))
+        except BaseException:
+            self._remove(temp_path)
+            raise
+
+        self.writes_since_scan += 1
+        if self.size_estimate is not None:
+            # Replacing an entry is counted as growth, which only makes the next scan come sooner
+            self.size_estimate += len(data)
+        if (self.size_estimate is None or self.size_estimate > self.max_bytes
+                or self.writes_since_scan >= RESCAN_INTERVAL):
+            self.evict()
+
+    def _entries(self) -> Iterable[os.DirEntry]:
+        """Yield the directory entries of the cache files, clearing out stale temporary files."""
+        now = time.time()
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.name.endswith(SUFFIX):
+                    yield entry
+                elif entry.name.startswith(TEMP_PREFIX):
+                    try:
+                        if now - entry.stat().st_mtime > STALE_TEMP_SECONDS:
+                            self._remove(entry.path)
+                    except FileNotFoundError:
+                        pass
+
+    def evict(self) -> None:
+        """If the cache is over max_bytes, delete the least recently used entries until it fits in TRIM_FRACTION of it."""
+        files = []
+        for entry in self._entries():
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in files)
+        target = self.max_bytes * TRIM_FRACTION if total > self.max_bytes else total
+        for _, size, path in sorted(files):
+            if total <= target:
+                break
+            self._remove(path)
+            total -= size
+        self.size_estimate = total
+        self.writes_since_scan = 0
+
+    def clear(self) -> None:
+        """Delete every entry."""
+        for entry in self._entries():
+            self._remove(entry.path)
+        self.size_estimate = 0
+        self.writes_since_scan = 0
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
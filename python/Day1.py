@@ -1,5 +1,17 @@
+import heapq
+import os
+import sys
+import tempfile
+from array import array
+from bisect import bisect_left, bisect_right
 from collections import Counter
-from typing import List, Tuple
+from itertools import accumulate, groupby, repeat
+from math import isqrt
+from operator import mul, sub
+from typing import Iterable, Iterator, List, Tuple
+
+import Instrument
+from Input import data_path, int_columns, open_input, parse_int_tokens
 
 def calculate_total_distance(left_list: List[int], right_list: List[int]) -> int:
     """
@@ -34,6 +46,233 @@ def calculate_similarity_score(left_list: List[int], right_list: List[int]) -> i
     right_count = Counter(right_list)
     return sum(num * right_count[num] for num in left_list)
 
+def solve_lists(left_list: List[int], right_list: List[int]) -> Tuple[int, int]:
+    """
+    Compute both answers from the two lists.
+
+    Parameters:
+        left_list (List[int]): The first list of integers.
+        right_list (List[int]): The second list of integers.
+
+    Returns:
+        Tuple[int,int]: The total distance and the similarity score.
+    """
+    return calculate_total_distance(left_list, right_list), calculate_similarity_score(left_list, right_list)
+
+def solve(filename: str) -> Tuple[int, int]:
+    """
+    Solve both parts from a single parse of the input file.
+
+    Parameters:
+        filename (str): The path to the input file.
+
+    Returns:
+        Tuple[int,int]: The answers to part 1 and part 2.
+    """
+    with Instrument.phase('day1.parse'):
+        left_list, right_list = read_lists_from_file(filename)
+    with Instrument.phase('day1.solve'):
+        return solve_lists(left_list, right_list)
+
+# Smallest number of segments per _BalanceBlock; blocks otherwise hold about sqrt(segments) each
+MIN_BLOCK_SEGMENTS = 32
+
+class _BalanceBlock:
+    """
+    A run of consecutive segments of the value line, for DistanceTracker.
+
+    Segment k starts at values[k] and is gaps[k] wide. Its balance is balances[k] + offset, where
+    the offset is added to the whole block at once. The balances are also kept sorted, with prefix
+    sums of the gaps and of gap * balance in that order. So the block's share of the distance,
+    sum(gap * |balance|), takes one bisect to compute for any offset.
+    """
+
+    __slots__ = ('values', 'balances', 'gaps', 'offset', 'keys', 'gap_sums', 'weighted_sums', 'distance')
+
+    def __init__(self, values: List[int], balances: List[int], gaps: List[int]):
+        self.values = values
+        self.balances = balances
+        self.gaps = gaps
+        self.offset = 0
+        self.rebuild()
+
+    def rebuild(self) -> None:
+        """Fold the offset into the balances and re-sort them, after segments are changed one by one."""
+        if self.offset:
+            self.balances = [balance + self.offset for balance in self.balances]
+            self.offset = 0
+        order = sorted(range(len(self.balances)), key=self.balances.__getitem__)
+        self.keys = list(map(self.balances.__getitem__, order))
+        gaps = list(map(self.gaps.__getitem__, order))
+        self.gap_sums = [0, *accumulate(gaps)]
+        self.weighted_sums = [0, *accumulate(map(mul, gaps, self.keys))]
+        self.distance = self._distance()
+
+    def shift(self, delta: int) -> None:
+        """Add delta to the balance of every segment in the block."""
+        self.offset += delta
+        self.distance = self._distance()
+
+    def _distance(self) -> int:
+        # Segments before `split` have a negative balance and count negated
+        split = bisect_left(self.keys, -self.offset)
+        gap_sums, weighted_sums = self.gap_sums, self.weighted_sums
+        return (weighted_sums[-1] - 2 * weighted_sums[split]
+                + self.offset * (gap_sums[-1] - 2 * gap_sums[split]))
+
+class DistanceTracker:
+    """
+    Keeps the total distance and similarity score of two lists up to date as pairs are added and removed.
+
+    The occurrence counts of both lists are kept in Counters. The similarity score is the sum of
+    v * left_count[v] * right_count[v] over all values, so a change moves it by a single product.
+
+    The total distance is the integral over x of |#left values <= x - #right values <= x|. The
+    distinct values seen so far cut the value line into segments, each with a constant balance
+    (that difference of counts) and a width. Adding the pair (l, r) adds 1 to the balance of the
+    segments from l up to r, or subtracts 1 from those from r up to l, and removing it does the
+    opposite. The segments are split into blocks of about sqrt(m) for m distinct values. A block
+    entirely inside that range takes the change as an offset, and at most two blocks at its ends
+    are re-sorted. A change therefore costs O(sqrt(m) log m) rather than being local: the range
+    between l and r spans about a third of the segments for independent values. Values are
+    never dropped from the segments, so m counts every distinct value ever added.
+    """
+
+    def __init__(self, left_list: Iterable[int] = (), right_list: Iterable[int] = ()):
+        """
+        Parameters:
+            left_list (Iterable[int]): The initial left list.
+            right_list (Iterable[int]): The initial right list, of the same length.
+        """
+        left_list, right_list = list(left_list), list(right_list)
+        if len(left_list) != len(right_list):
+            raise ValueError("Both lists must have the same length")
+        self.left_count = Counter(left_list)
+        self.right_count = Counter(right_list)
+        left_get, right_get = self.left_count.get, self.right_count.get
+        self.similarity_score = sum(value * count * right_get(value, 0) for value, count in self.left_count.items())
+
+        values = sorted(self.left_count.keys() | self.right_count.keys())
+        balances = list(accumulate(map(sub, map(left_get, values, repeat(0)), map(right_get, values, repeat(0)))))
+        # The last segment runs to infinity with a zero balance, so it is given no width
+        gaps = list(map(sub, values[1:], values)) + [0] * bool(values)
+
+        self.segments = len(values)
+        size = self._block_size()
+        self.blocks = [_BalanceBlock(values[i:i + size], balances[i:i + size], gaps[i:i + size])
+                       for i in range(0, len(values), size)]
+        self.firsts = [block.values[0] for block in self.blocks]
+        self.total_distance = sum(block.distance for block in self.blocks)
+
+    def _block_size(self) -> int:
+        return max(MIN_BLOCK_SEGMENTS, isqrt(self.segments))
+
+    def _locate(self, value: int) -> Tuple[int, int]:
+        """Return the block index and the index within it of the segment holding value, or (-1, -1) before the first."""
+        index = bisect_right(self.firsts, value) - 1
+        if index < 0:
+            return -1, -1
+        return index, bisect_right(self.blocks[index].values, value) - 1
+
+    def _add_value(self, value: int) -> None:
+        """Start a new segment at value, if none starts there yet; the distance is unchanged."""
+        index, position = self._locate(value)
+        if index >= 0 and self.blocks[index].values[position] == value:
+            return
+
+        if not self.blocks:
+            self.blocks.append(_BalanceBlock([value], [0], [0]))
+            self.firsts.append(value)
+        elif index < 0:
+            # Nothing lies below the new first value, so its segment is balanced
+            block = self.blocks[0]
+            block.values.insert(0, value)
+            block.balances.insert(0, -block.offset)
+            block.gaps.insert(0, self.firsts[0] - value)
+            block.rebuild()
+            self.firsts[0] = value
+        else:
+            # Split the segment holding value; both halves keep its balance
+            block = self.blocks[index]
+            width = value - block.values[position]
+            is_last = index == len(self.blocks) - 1 and position == len(block.values) - 1
+            block.values.insert(position + 1, value)
+            block.balances.insert(position + 1, block.balances[position])
+            block.gaps.insert(position + 1, 0 if is_last else block.gaps[position] - width)
+            block.gaps[position] = width
+            block.rebuild()
+
+        self.segments += 1
+        index = max(index, 0)
+        block = self.blocks[index]
+        if len(block.values) > 2 * self._block_size():
+            half = len(block.values) // 2
+            balances = [balance + block.offset for balance in block.balances]
+            self.blocks[index:index + 1] = [
+                _BalanceBlock(block.values[:half], balances[:half], block.gaps[:half]),
+                _BalanceBlock(block.values[half:], balances[half:], block.gaps[half:]),
+            ]
+            self.firsts.insert(index + 1, block.values[half])
+
+    def _shift(self, low: int, high: int, delta: int) -> None:
+        """Add delta to the balance of the segments from value low up to value high, both already segment starts."""
+        first, start = self._locate(low)
+        last, stop = self._locate(high)
+        for index in range(first, last + 1):
+            block = self.blocks[index]
+            begin = start if index == first else 0
+            end = stop if index == last else len(block.values)
+            before = block.distance
+            if begin == 0 and end == len(block.values):
+                block.shift(delta)
+            elif begin < end:
+                for k in range(begin, end):
+                    block.balances[k] += delta
+                block.rebuild()
+            self.total_distance += block.distance - before
+
+    def _move(self, left: int, right: int, delta: int) -> None:
+        """Apply adding (delta=1) or removing (delta=-1) the pair (left, right) to the balances."""
+        if left < right:
+            self._shift(left, right, delta)
+        elif right < left:
+            self._shift(right, left, -delta)
+
+    def add_pair(self, left: int, right: int) -> None:
+        """
+        Add a value to each list.
+
+        Parameters:
+            left (int): The value to add to the left list.
+            right (int): The value to add to the right list.
+        """
+        self._add_value(left)
+        self._add_value(right)
+        self._move(left, right, 1)
+
+        self.similarity_score += left * self.right_count[left]
+        self.left_count[left] += 1
+        self.similarity_score += right * self.left_count[right]
+        self.right_count[right] += 1
+
+    def remove_pair(self, left: int, right: int) -> None:
+        """
+        Remove a value from each list.
+
+        Parameters:
+            left (int): The value to remove from the left list.
+            right (int): The value to remove from the right list.
+        """
+        if self.left_count[left] == 0 or self.right_count[right] == 0:
+            raise ValueError(f"Pair ({left}, {right}) is not tracked")
+
+        self._move(left, right, -1)
+
+        self.right_count[right] -= 1
+        self.similarity_score -= right * self.left_count[right]
+        self.left_count[left] -= 1
+        self.similarity_score -= left * self.right_count[left]
+
 def read_lists_from_file(filename: str) -> Tuple[List[int], List[int]]:
     """
     Read pairs of integers from the given file and separate them into two lists.
@@ -46,26 +285,178 @@ def read_lists_from_file(filename: str) -> Tuple[List[int], List[int]]:
     Returns:
         Tuple[List[int], List[int]]: Two lists, one containing all left integers and the other all right integers.
     """
-    left_list, right_list = [], []
+    with open_input(filename) as data:
+        left_list, right_list = int_columns(data, 2)
+    return left_list, right_list
+
+def read_arrays_from_file(filename: str):
+    """
+    Read pairs of integers from the given file straight into two int64 arrays.
+
+    Requires NumPy.
+
+    Parameters:
+        filename (str): The path to the input file.
+
+    Returns:
+        Tuple[numpy.ndarray, numpy.ndarray]: The left and right columns.
+    """
+    with open_input(filename) as data:
+        values = parse_int_tokens(data)
+    return values[0::2], values[1::2]
+
+def calculate_total_distance_array(left, right) -> int:
+    """
+    Array version of calculate_total_distance.
+
+    Requires NumPy.
+
+    Parameters:
+        left (numpy.ndarray): The first list of integers.
+        right (numpy.ndarray): The second list of integers.
+
+    Returns:
+        int: The sum of absolute differences between paired elements.
+    """
+    import numpy as np
+
+    return int(np.abs(np.sort(left) - np.sort(right)).sum())
+
+def calculate_similarity_score_array(left, right) -> int:
+    """
+    Array version of calculate_similarity_score.
+
+    The occurrences of every left value in the right list are found by binary search in the
+    sorted right list. The left list is sorted too, which keeps the searches cache friendly.
+
+    Requires NumPy.
+
+    Parameters:
+        left (numpy.ndarray): The first list of integers.
+        right (numpy.ndarray): The second list of integers.
+
+    Returns:
+        int: The calculated similarity score.
+    """
+    import numpy as np
+
+    left_sorted = np.sort(left)
+    right_sorted = np.sort(right)
+    counts = (np.searchsorted(right_sorted, left_sorted, side='right')
+              - np.searchsorted(right_sorted, left_sorted, side='left'))
+    return int((left_sorted * counts).sum())
+
+def write_sorted_runs(filename: str, run_size: int, directory: str) -> Tuple[List[str], List[str]]:
+    """
+    Stream the pairs from the input file into sorted runs of each column on disk.
+
+    Parameters:
+        filename (str): The path to the input file.
+        run_size (int): The number of values per column held in memory before a run is written.
+        directory (str): The directory for the run files.
+
+    Returns:
+        Tuple[List[str], List[str]]: The run files of the left column and of the right column.
+    """
+    left_runs, right_runs = [], []
+    left, right = array('q'), array('q')
+
+    def flush() -> None:
+        for values, runs in ((left, left_runs), (right, right_runs)):
+            path = os.path.join(directory, f"run{len(left_runs) + len(right_runs)}.bin")
+            with open(path, 'wb') as run:
+                array('q', sorted(values)).tofile(run)
+            runs.append(path)
+            del values[:]
+
     with open(filename, 'r') as file:
         for line in file:
-            left, right = map(int, line.split())
-            left_list.append(left)
-            right_list.append(right)
-    return left_list, right_list
+            l, r = line.split()
+            left.append(int(l))
+            right.append(int(r))
+            if len(left) >= run_size:
+                flush()
+    if left:
+        flush()
+    return left_runs, right_runs
+
+def read_run(path: str, block: int) -> Iterator[int]:
+    """Yield the values of a run file, reading `block` values at a time."""
+    with open(path, 'rb') as run:
+        while True:
+            values = array('q')
+            try:
+                values.fromfile(run, block)
+            except EOFError:
+                # fromfile still keeps the values it managed to read
+                yield from values
+                return
+            yield from values
+
+def count_runs(values: Iterator[int]) -> Iterator[Tuple[int, int]]:
+    """Collapse a sorted stream into (value, count) pairs."""
+    for value, group in groupby(values):
+        yield value, sum(1 for _ in group)
+
+def calculate_metrics_external(filename: str, run_size: int = 1_000_000) -> Tuple[int, int]:
+    """
+    Compute the total distance and similarity score of pair files too large to fit in memory.
+
+    The input is streamed into sorted runs of each column on disk, and the runs of both columns
+    are k-way merged side by side in a single pass over increasing values. With equal-length
+    lists, the total distance equals the sum over every gap between consecutive values of the gap
+    times |#left values below it - #right values below it|, so it can be accumulated in value order
+    together with the similarity score, which matches equal-value runs of the two columns.
+    Memory is bounded by `run_size` values per column.
+
+    Parameters:
+        filename (str): The path to the input file.
+        run_size (int): The number of values per column sorted in memory at a time.
+
+    Returns:
+        Tuple[int,int]: The total distance and the similarity score.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        left_runs, right_runs = write_sorted_runs(filename, run_size, directory)
+        block = max(1, min(run_size, 1 << 16) // max(1, len(left_runs)))
+        left = count_runs(heapq.merge(*(read_run(path, block) for path in left_runs)))
+        right = count_runs(heapq.merge(*(read_run(path, block) for path in right_runs)))
+
+        total_distance = 0
+        similarity_score = 0
+        balance = 0  # left values seen minus right values seen
+        previous = None
+        left_head, right_head = next(left, None), next(right, None)
+        while left_head is not None or right_head is not None:
+            if right_head is None or (left_head is not None and left_head[0] <= right_head[0]):
+                value = left_head[0]
+            else:
+                value = right_head[0]
+            left_count = right_count = 0
+            if left_head is not None and left_head[0] == value:
+                left_count = left_head[1]
+                left_head = next(left, None)
+            if right_head is not None and right_head[0] == value:
+                right_count = right_head[1]
+                right_head = next(right, None)
+
+            if previous is not None:
+                total_distance += abs(balance) * (value - previous)
+            balance += left_count - right_count
+            similarity_score += value * left_count * right_count
+            previous = value
+
+    return total_distance, similarity_score
 
-def main():
+def main(file_path: str = data_path(1)):
     """Execute Day 1 puzzle solution."""
-    file_path = '../data/Day1.txt'
-    left_list, right_list = read_lists_from_file(file_path)
+    total_distance, similarity_score = solve(file_path)
 
     # Part 1
-    total_distance = calculate_total_distance(left_list, right_list)
     print(f"Day 1 - Part 1: Total distance: {total_distance}")
 
     # Part 2
-    similarity_score = calculate_similarity_score(left_list, right_list)
     print(f"Day 1 - Part 2: Similarity score: {similarity_score}")
 
 if __name__ == "__main__":
-    main()
+    main(*sys.argv[1:2])
@@ -1,4 +1,8 @@
-from typing import List
+import sys
+from typing import List, Tuple
+
+import Instrument
+from Input import data_path, int_rows, open_input, parse_int_rows
 
 def is_safe_report(report: List[int]) -> bool:
     """
@@ -18,24 +22,82 @@ def is_safe_report(report: List[int]) -> bool:
         return True
     return False
 
-def is_safe_with_dampener(report: List[int]) -> bool:
+def first_violation(report: List[int], direction: int, skip: int = -1) -> int:
     """
-    Check if a report can be made safe by removing exactly one level (one element from the list).
+    Find the first level that breaks the safety rule, optionally pretending one level is removed.
+
+    Parameters:
+        report (List[int]): A list of integers representing the report.
+        direction (int): 1 for an increasing report, -1 for a decreasing one.
+        skip (int): Index of a level to leave out, or -1 to keep every level.
+
+    Returns:
+        int: The index of the first level whose difference from the previous kept level is not
+        between 1 and 3 in the given direction, or -1 if there is none.
+    """
+    previous = None
+    for i, level in enumerate(report):
+        if i == skip:
+            continue
+        if previous is not None and not 1 <= (level - previous) * direction <= 3:
+            return i
+        previous = level
+    return -1
+
+def min_removals(report: List[int], direction: int, limit: int) -> int:
+    """
+    Find the fewest levels to remove so the report is safe in the given direction.
+
+    A level can only follow one of the limit + 1 levels before it, since anything further back
+    would need more than `limit` removals in between, so this takes O(n * limit) time.
+
+    Parameters:
+        report (List[int]): A list of integers representing the report.
+        direction (int): 1 for an increasing report, -1 for a decreasing one.
+        limit (int): The largest number of removals of interest.
+
+    Returns:
+        int: The fewest removals needed, or limit + 1 if more than `limit` are needed.
+    """
+    n = len(report)
+    if n == 0:
+        return 0
+
+    # best[i]: fewest removals among levels 0..i that leave a safe report ending at level i
+    best = [0] * n
+    for i in range(n):
+        fewest = i
+        for j in range(max(0, i - limit - 1), i):
+            if 1 <= (report[i] - report[j]) * direction <= 3:
+                fewest = min(fewest, best[j] + i - j - 1)
+        best[i] = fewest
+
+    return min(min(best[i] + n - 1 - i for i in range(n)), limit + 1)
+
+def is_safe_with_dampener(report: List[int], tolerance: int = 1) -> bool:
+    """
+    Check if a report can be made safe by removing at most `tolerance` levels (elements from the list).
     If the report is already safe, return True.
-    Otherwise, try removing each element and check if it becomes safe.
+
+    With the default tolerance of one, any fix must remove one of the two levels around the first
+    violation, so at most two more scans per direction are needed. Larger tolerances fall back to
+    min_removals. Either way no copies of the report are made.
 
     Parameters:
         report (List[int]): The report list.
+        tolerance (int): The largest number of levels that may be removed.
 
     Returns:
-        bool: True if the report can be safe after removing zero or one element, False otherwise.
+        bool: True if the report can be safe after removing up to `tolerance` elements, False otherwise.
     """
-    if is_safe_report(report):
-        return True
+    if tolerance != 1:
+        return any(min_removals(report, direction, tolerance) <= tolerance for direction in (1, -1))
 
-    for i in range(len(report)):
-        modified_report = report[:i] + report[i+1:]
-        if is_safe_report(modified_report):
+    for direction in (1, -1):
+        bad = first_violation(report, direction)
+        if bad == -1:
+            return True
+        if first_violation(report, direction, bad) == -1 or first_violation(report, direction, bad - 1) == -1:
             return True
 
     return False
@@ -54,29 +116,161 @@ def count_safe_reports(filename: str, with_dampener: bool = False) -> int:
     Returns:
         int: Number of safe reports.
     """
+    if with_dampener:
+        return solve(filename)[1]
+    return sum(map(is_safe_report, read_reports_from_file(filename)))
+
+def read_reports_from_file(filename: str) -> List[List[int]]:
+    """
+    Read every report in the file as a list of levels.
+
+    Parameters:
+        filename (str): Path to the file containing reports.
+
+    Returns:
+        List[List[int]]: The reports.
+    """
+    with open_input(filename) as data:
+        return int_rows(data)
+
+def solve_reports(reports: List[List[int]]) -> Tuple[int, int]:
+    """
+    Count the safe reports with and without the Problem Dampener in one pass.
+
+    A report that is safe as-is is also safe with the dampener, so the dampener check only
+    runs on the reports that fail the plain one.
+
+    Parameters:
+        reports (List[List[int]]): The reports.
+
+    Returns:
+        Tuple[int,int]: The number of safe reports, and the number safe with the Problem Dampener.
+    """
     safe_count = 0
-    with open(filename, 'r') as file:
-        for line in file:
-            report = list(map(int, line.split()))
-            if with_dampener:
-                if is_safe_with_dampener(report):
-                    safe_count += 1
-            else:
-                if is_safe_report(report):
-                    safe_count += 1
-    return safe_count
-
-def main():
+    dampened_count = 0
+    for report in reports:
+        if is_safe_report(report):
+            safe_count += 1
+        elif is_safe_with_dampener(report):
+            dampened_count += 1
+    Instrument.count('day2.reports_checked', len(reports))
+    return safe_count, safe_count + dampened_count
+
+def solve(filename: str) -> Tuple[int, int]:
+    """
+    Solve both parts from a single parse of the input file.
+
+    Parameters:
+        filename (str): Path to the file containing reports.
+
+    Returns:
+        Tuple[int,int]: The answers to part 1 and part 2.
+    """
+    with Instrument.phase('day2.parse'):
+        reports = read_reports_from_file(filename)
+    with Instrument.phase('day2.solve'):
+        return solve_reports(reports)
+
+def parse_reports(filename: str):
+    """
+    Parse every report in the file at once into a flat array of levels plus report offsets.
+
+    Requires NumPy.
+
+    Parameters:
+        filename (str): Path to the file containing reports.
+
+    Returns:
+        Tuple[numpy.ndarray, numpy.ndarray]: All levels as one int64 array, and the offsets at
+        which each report starts in it, with the total length appended at the end.
+    """
+    with open_input(filename) as data:
+        return parse_int_rows(data)
+
+def evaluate_reports(values, offsets):
+    """
+    Compute the safe and dampener-safe flags of every report with whole-array operations.
+
+    A report is dampener-safe if removing some level leaves no bad difference. Removing level i
+    drops the differences on both sides of it and adds the difference between its neighbours, so
+    for every level this only needs the report's bad-difference count, the two adjacent
+    differences and the bridging difference.
+
+    Requires NumPy.
+
+    Parameters:
+        values (numpy.ndarray): All levels, as returned by parse_reports.
+        offsets (numpy.ndarray): The report offsets, as returned by parse_reports.
+
+    Returns:
+        Tuple[numpy.ndarray, numpy.ndarray]: Boolean arrays flagging the safe reports and the
+        reports that are safe with the Problem Dampener.
+    """
+    import numpy as np
+
+    reports = len(offsets) - 1
+    lengths = np.diff(offsets)
+    report_of = np.repeat(np.arange(reports), lengths)
+    n = len(values)
+
+    # Position of every level inside its report
+    local = np.arange(n) - offsets[report_of]
+    has_left = local > 0
+    has_right = local < lengths[report_of] - 1
+
+    diffs = np.diff(values)
+    # Difference between the neighbours of every level, used when that level is removed
+    bridges = np.zeros(n, dtype=np.int64)
+    bridges[1:-1] = values[2:] - values[:-2]
+
+    safe = np.zeros(reports, dtype=bool)
+    dampened = np.zeros(reports, dtype=bool)
+    for direction in (1, -1):
+        steps = diffs * direction
+        bad = ~((steps >= 1) & (steps <= 3))
+        # Differences that cross from one report into the next do not count
+        bad_in_report = bad & has_right[:-1]
+        bad_counts = np.bincount(report_of[:-1][bad_in_report], minlength=reports)
+        safe |= bad_counts == 0
+
+        bad_left = np.zeros(n, dtype=np.int64)
+        bad_left[1:] = bad_in_report
+        bad_right = np.zeros(n, dtype=np.int64)
+        bad_right[:-1] = bad_in_report
+        bridge_steps = bridges * direction
+        bridge_ok = ~(has_left & has_right) | ((bridge_steps >= 1) & (bridge_steps <= 3))
+
+        removable = (bad_counts[report_of] - bad_left - bad_right == 0) & bridge_ok
+        dampened |= np.bincount(report_of[removable], minlength=reports) > 0
+
+    dampened |= safe
+    return safe, dampened
+
+def count_safe_reports_batch(filename: str) -> Tuple[int, int]:
+    """
+    Count the safe reports with and without the Problem Dampener from a single parse of the file.
+
+    Requires NumPy.
+
+    Parameters:
+        filename (str): Path to the file containing reports.
+
+    Returns:
+        Tuple[int,int]: The number of safe reports, and the number safe with the Problem Dampener.
+    """
+    safe, dampened = evaluate_reports(*parse_reports(filename))
+    return int(safe.sum()), int(dampened.sum())
+
+def main(file_path: str = data_path(2)):
     """Execute Day 2 puzzle solution."""
-    file_path = '../data/Day2.txt'
+    # Both counts come out of one parse and one pass over the reports
+    safe_reports_count, safe_reports_with_dampener = solve(file_path)
 
     # Part 1
-    safe_reports_count = count_safe_reports(file_path)
     print(f"Day 2 - Part 1: Number of safe reports: {safe_reports_count}")
 
     # Part 2
-    safe_reports_with_dampener = count_safe_reports(file_path, with_dampener=True)
     print(f"Day 2 - Part 2: Number of safe reports with Dampener: {safe_reports_with_dampener}")
 
 if __name__ == "__main__":
-    main()
+    main(*sys.argv[1:2])
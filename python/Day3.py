@@ -1,4 +1,109 @@
+import os
 import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import reduce
+from itertools import chain, repeat
+from typing import Iterator, NamedTuple, Optional, Tuple, Union
+
+import Instrument
+from Input import Buffer, as_bytes, data_path, open_input
+
+# One alternation for every instruction; the capture group that matched tells them apart
+INSTRUCTION_PATTERN = re.compile(r"mul\((\d+),(\d+)\)|(do\(\))|(don't\(\))")
+BYTES_INSTRUCTION_PATTERN = re.compile(INSTRUCTION_PATTERN.pattern.encode())
+DO_GROUP = 3
+DONT_GROUP = 4
+
+# Upper bound on the bytes one worker scans per task in sum_mul_instructions_parallel
+PARALLEL_CHUNK_SIZE = 1 << 24
+
+# An unfinished instruction running up to the end of a buffer, which more input could complete
+PARTIAL_INSTRUCTION_PATTERN = re.compile(
+    rb"(?:m(?:u(?:l(?:\((?:\d+(?:,\d*)?)?)?)?)?|d(?:o(?:\(|n(?:'(?:t\(?)?)?)?)?)\Z"
+)
+
+def scan_instructions(memory: Union[str, Buffer], mul_enabled: bool = True) -> Tuple[int, int, bool, int]:
+    """
+    Scan a piece of memory once, summing mul(X,Y) products with and without the do()/don't() switches.
+
+    Parameters:
+        memory (Union[str, Buffer]): The corrupted memory, as text or a raw (possibly memory-mapped) buffer.
+        mul_enabled (bool): Whether mul instructions are enabled at the start of the memory.
+
+    Returns:
+        Tuple[int,int,bool,int]: The sum over all mul instructions, the sum over the enabled ones,
+        whether mul instructions are enabled at the end, and the end offset of the last instruction.
+    """
+    pattern = INSTRUCTION_PATTERN if isinstance(memory, str) else BYTES_INSTRUCTION_PATTERN
+    total = 0
+    enabled_total = 0
+    end = 0
+
+    matches = 0
+    for matches, match in enumerate(pattern.finditer(memory), 1):
+        kind = match.lastindex
+        if kind == DO_GROUP:
+            mul_enabled = True
+        elif kind == DONT_GROUP:
+            mul_enabled = False
+        else:
+            product = int(match.group(1)) * int(match.group(2))
+            total += product
+            if mul_enabled:
+                enabled_total += product
+        end = match.end()
+
+    Instrument.count('day3.regex_matches', matches)
+    return total, enabled_total, mul_enabled, end
+
+def sum_mul_instructions(memory: Union[str, Buffer]) -> Tuple[int, int]:
+    """
+    Scan the memory once and sum the mul(X,Y) products both with and without the do()/don't() switches.
+
+    Parameters:
+        memory (Union[str, Buffer]): The corrupted memory, as text or a raw (possibly memory-mapped) buffer.
+
+    Returns:
+        Tuple[int,int]: The sum over all mul instructions, and the sum over the enabled ones.
+    """
+    total, enabled_total, _, _ = scan_instructions(memory)
+    return total, enabled_total
+
+def sum_mul_instructions_from_file(filename: str, chunk_size: int = 1 << 20) -> Tuple[int, int]:
+    """
+    Stream a memory dump from disk in binary chunks and sum the mul(X,Y) products.
+
+    Every instruction ends with ')', so a match found in a chunk is final. Only an unfinished
+    instruction at the very end of a chunk is carried over and prepended to the next one, along
+    with the do()/don't() state, so memory use stays bounded by the chunk size.
+
+    Parameters:
+        filename (str): The path to the memory dump.
+        chunk_size (int): The number of bytes read at a time.
+
+    Returns:
+        Tuple[int,int]: The sum over all mul instructions, and the sum over the enabled ones.
+    """
+    total = 0
+    enabled_total = 0
+    mul_enabled = True
+    tail = b''
+
+    with open(filename, 'rb') as file:
+        while True:
+            chunk = file.read(chunk_size)
+            if not chunk:
+                break
+            buffer = tail + chunk if tail else chunk
+            chunk_total, chunk_enabled_total, mul_enabled, end = scan_instructions(buffer, mul_enabled)
+            total += chunk_total
+            enabled_total += chunk_enabled_total
+
+            partial = PARTIAL_INSTRUCTION_PATTERN.search(buffer, end)
+            tail = buffer[partial.start():] if partial else b''
+
+    return total, enabled_total
 
 def extract_and_sum_mul_instructions(memory: str) -> int:
     """
@@ -11,15 +116,7 @@ def extract_and_sum_mul_instructions(memory: str) -> int:
     Returns:
         int: The sum of products from all valid mul instructions.
     """
-    pattern = r"mul\(\d+,\d+\)"
-    matches = re.findall(pattern, memory)
-
-    total = 0
-    for match in matches:
-        numbers = list(map(int, re.findall(r"\d+", match)))
-        if len(numbers) == 2:
-            total += numbers[0] * numbers[1]
-    return total
+    return sum_mul_instructions(memory)[0]
 
 def extract_and_sum_mul_instructions_with_conditions(memory: str) -> int:
     """
@@ -33,31 +130,127 @@ def extract_and_sum_mul_instructions_with_conditions(memory: str) -> int:
     Returns:
         int: The sum of products of mul instructions that were enabled.
     """
-    mul_pattern = r"mul\(\d+,\d+\)"
-    control_pattern = r"do\(\)|don't\(\)"
+    return sum_mul_instructions(memory)[1]
 
-    mul_matches = re.finditer(mul_pattern, memory)
-    control_matches = re.finditer(control_pattern, memory)
+class ChunkSummary(NamedTuple):
+    """
+    The result of scanning one chunk of memory without knowing the do()/don't() state before it.
 
-    all_matches = sorted(
-        list(mul_matches) + list(control_matches), key=lambda match: match.start()
+    Attributes:
+        total (int): The sum over all mul instructions in the chunk.
+        enabled_if_on (int): The sum over enabled mul instructions if the chunk starts enabled.
+        enabled_if_off (int): The sum over enabled mul instructions if the chunk starts disabled.
+        end_state (Optional[bool]): The state set by the chunk's last do()/don't(), or None if it has none.
+    """
+    total: int
+    enabled_if_on: int
+    enabled_if_off: int
+    end_state: Optional[bool]
+
+def merge_summaries(left: ChunkSummary, right: ChunkSummary) -> ChunkSummary:
+    """
+    Combine the summaries of two adjacent chunks into the summary of both.
+
+    The merge is associative, so the summaries of any number of chunks can be combined in order.
+
+    Parameters:
+        left (ChunkSummary): The summary of the earlier chunk.
+        right (ChunkSummary): The summary of the chunk right after it.
+
+    Returns:
+        ChunkSummary: The summary of the two chunks together.
+    """
+    # The state entering `right` is left's end state, or the starting state if left has no switch
+    after_on = left.end_state if left.end_state is not None else True
+    after_off = left.end_state if left.end_state is not None else False
+    return ChunkSummary(
+        left.total + right.total,
+        left.enabled_if_on + (right.enabled_if_on if after_on else right.enabled_if_off),
+        left.enabled_if_off + (right.enabled_if_on if after_off else right.enabled_if_off),
+        right.end_state if right.end_state is not None else left.end_state,
     )
 
-    total = 0
-    mul_enabled = True
+def summarize_chunk(filename: str, start: int, stop: int) -> ChunkSummary:
+    """
+    Scan the instructions that start in bytes [start, stop) of a memory dump.
 
-    for match in all_matches:
-        text = match.group()
-        if text == "do()":
-            mul_enabled = True
-        elif text == "don't()":
-            mul_enabled = False
-        elif mul_enabled and "mul" in text:
-            numbers = list(map(int, re.findall(r"\d+", text)))
-            if len(numbers) == 2:
-                total += numbers[0] * numbers[1]
+    Instructions never overlap, so each one belongs to the chunk its first byte is in. An
+    instruction that straddles `stop` is completed by matching it against the rest of the file.
+
+    Parameters:
+        filename (str): The path to the memory dump.
+        start (int): The first byte of the chunk.
+        stop (int): One past the last byte of the chunk.
+
+    Returns:
+        ChunkSummary: The sums for both possible starting states and the chunk's end state.
+    """
+    with open_input(filename) as mapped:
+        end = start
 
-    return total
+        def straddling() -> Iterator[re.Match]:
+            # Runs once the chunk's own matches are used up, so `end` is the last one's end
+            partial = PARTIAL_INSTRUCTION_PATTERN.search(mapped, end, stop)
+            if partial:
+                match = BYTES_INSTRUCTION_PATTERN.match(mapped, partial.start())
+                if match:
+                    yield match
+
+        total = 0
+        enabled_if_on = 0
+        enabled_if_off = 0
+        end_state = None
+        matches = 0
+        for matches, match in enumerate(chain(BYTES_INSTRUCTION_PATTERN.finditer(mapped, start, stop),
+                                              straddling()), 1):
+            kind = match.lastindex
+            if kind == DO_GROUP:
+                end_state = True
+            elif kind == DONT_GROUP:
+                end_state = False
+            else:
+                product = int(match.group(1)) * int(match.group(2))
+                total += product
+                if end_state is None:
+                    # Before the first switch the chunk's starting state decides
+                    enabled_if_on += product
+                elif end_state:
+                    enabled_if_on += product
+                    enabled_if_off += product
+            end = match.end()
+
+        Instrument.count('day3.regex_matches', matches)
+        return ChunkSummary(total, enabled_if_on, enabled_if_off, end_state)
+
+def sum_mul_instructions_parallel(filename: str, workers: int = 4, chunk_size: int = 0) -> Tuple[int, int]:
+    """
+    Scan a memory dump with a process pool and sum the mul(X,Y) products.
+
+    The file is split at byte offsets, each chunk is summarized for both possible starting
+    states, and the summaries are merged left to right. The result equals
+    sum_mul_instructions on the whole file.
+
+    Parameters:
+        filename (str): The path to the memory dump.
+        workers (int): Number of worker processes.
+        chunk_size (int): Bytes per chunk; by default four chunks per worker, but at most
+            PARALLEL_CHUNK_SIZE, so large dumps are cut into many small chunks.
+
+    Returns:
+        Tuple[int,int]: The sum over all mul instructions, and the sum over the enabled ones.
+    """
+    size = os.path.getsize(filename)
+    if size == 0:
+        return 0, 0
+    if chunk_size <= 0:
+        chunk_size = min(-(-size // (workers * 4)), PARALLEL_CHUNK_SIZE)
+    starts = range(0, size, chunk_size)
+    stops = [min(start + chunk_size, size) for start in starts]
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        summaries = pool.map(summarize_chunk, repeat(filename), starts, stops)
+        summary = reduce(merge_summaries, summaries)
+    return summary.total, summary.enabled_if_on
 
 def read_memory_from_file(filename: str) -> str:
     """
@@ -69,21 +262,32 @@ def read_memory_from_file(filename: str) -> str:
     Returns:
         str: The file contents as a single string.
     """
-    with open(filename, 'r') as file:
-        return file.read()
+    with open_input(filename) as data:
+        return as_bytes(data).decode()
+
+def solve(filename: str) -> Tuple[int, int]:
+    """
+    Solve both parts with one scan, straight over the mapped input file.
+
+    Parameters:
+        filename (str): The path to the input file.
+
+    Returns:
+        Tuple[int,int]: The answers to part 1 and part 2.
+    """
+    with Instrument.phase('day3.solve'), open_input(filename) as memory:
+        return sum_mul_instructions(memory)
 
-def main():
+def main(file_path: str = data_path(3)):
     """Execute Day 3 puzzle solution."""
-    file_path = '../data/Day3.txt'
-    memory = read_memory_from_file(file_path)
+    # Both parts come out of the same scan
+    part1_result, part2_result = solve(file_path)
 
     # Part 1
-    part1_result = extract_and_sum_mul_instructions(memory)
     print(f"Day 3 - Part 1: Total sum of valid mul instructions: {part1_result}")
 
     # Part 2
-    part2_result = extract_and_sum_mul_instructions_with_conditions(memory)
     print(f"Day 3 - Part 2: Total sum of enabled mul instructions: {part2_result}")
 
 if __name__ == "__main__":
-    main()
+    main(*sys.argv[1:2])
@@ -1,4 +1,12 @@
-from typing import List
+import sys
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import repeat
+from typing import Callable, Dict, List, Optional, Tuple
+
+import Instrument
+from Input import Buffer, data_path, open_input, text_rows
 
 def count_word_occurrences(grid: List[str], word: str) -> int:
     """
@@ -12,34 +20,310 @@ def count_word_occurrences(grid: List[str], word: str) -> int:
     Returns:
         int: The total number of occurrences of the word in the grid.
     """
-    rows, cols = len(grid), len(grid[0])
-    word_length = len(word)
-    total_count = 0
+    templates = word_templates(word)
+    return sum(TemplateMatcher(templates, [WORD_PROBE_COUNTER] * len(templates)).count(grid))
+
+def grid_to_array(grid: List[str]):
+    """
+    Convert the grid into a 2D uint8 array of character codes.
+
+    Requires NumPy. The rows must all have the same length and contain only Latin-1 characters.
+
+    Parameters:
+        grid (List[str]): The 2D grid represented as a list of strings.
+
+    Returns:
+        numpy.ndarray: A (rows, cols) uint8 array.
+    """
+    import numpy as np
+
+    rows = len(grid)
+    cols = len(grid[0]) if rows else 0
+    return np.frombuffer(''.join(grid).encode('latin-1'), dtype=np.uint8).reshape(rows, cols)
+
+def count_word_occurrences_vectorized(grid, word: str) -> int:
+    """
+    Count the occurrences of a word in all eight directions using whole-grid array comparisons.
+
+    For each direction, the cells where the word could start are compared against each letter of
+    the word at once, by shifting the grid by the letter's offset along the direction. This gives
+    the same count as count_word_occurrences.
+
+    Requires NumPy.
+
+    Parameters:
+        grid: The grid as a list of strings, or a uint8 array from grid_to_array.
+        word (str): The word to search for.
+
+    Returns:
+        int: The total number of occurrences of the word in the grid.
+    """
+    import numpy as np
 
+    letters = grid_to_array(grid) if isinstance(grid, list) else grid
+    rows, cols = letters.shape
     directions = [
         (0, 1), (0, -1),
         (1, 0), (-1, 0),
         (1, 1), (-1, -1),
         (1, -1), (-1, 1),
     ]
+    if not word:
+        return rows * cols * len(directions)
 
-    def is_valid(r: int, c: int) -> bool:
-        return 0 <= r < rows and 0 <= c < cols
+    codes = word.encode('latin-1')
+    span = len(codes) - 1
+    total_count = 0
 
-    def count_from_position(r: int, c: int, direction: tuple) -> int:
-        for i in range(word_length):
-            nr, nc = r + i * direction[0], c + i * direction[1]
-            if not is_valid(nr, nc) or grid[nr][nc] != word[i]:
-                return 0
-        return 1
+    for dr, dc in directions:
+        # Range of start cells from which the whole word stays inside the grid
+        r0, r1 = max(0, -dr * span), rows - max(0, dr * span)
+        c0, c1 = max(0, -dc * span), cols - max(0, dc * span)
+        if r0 >= r1 or c0 >= c1:
+            continue
 
-    for r in range(rows):
-        for c in range(cols):
-            for direction in directions:
-                total_count += count_from_position(r, c, direction)
+        matches = np.ones((r1 - r0, c1 - c0), dtype=bool)
+        for i, code in enumerate(codes):
+            matches &= letters[r0 + i * dr:r1 + i * dr, c0 + i * dc:c1 + i * dc] == code
+        total_count += int(np.count_nonzero(matches))
 
     return total_count
 
+def grid_lines(grid: List[str]) -> List[str]:
+    """
+    Extract every row, column and diagonal of the grid as a string.
+
+    Reading each of these lines forwards and backwards covers all eight search directions.
+
+    Parameters:
+        grid (List[str]): The 2D grid represented as a list of strings.
+
+    Returns:
+        List[str]: The rows, columns, down-right diagonals and down-left diagonals.
+    """
+    rows, cols = len(grid), len(grid[0])
+    lines = list(grid)
+    lines.extend(''.join(grid[r][c] for r in range(rows)) for c in range(cols))
+    # Down-right diagonals have a constant c - r, down-left diagonals a constant r + c
+    for offset in range(-(rows - 1), cols):
+        lines.append(''.join(grid[r][r + offset] for r in range(max(0, -offset), min(rows, cols - offset))))
+    for total in range(rows + cols - 1):
+        lines.append(''.join(grid[r][total - r] for r in range(max(0, total - cols + 1), min(rows, total + 1))))
+    return lines
+
+def build_automaton(patterns: Dict[str, List[str]]) -> Tuple[List[Dict[str, int]], List[int], List[List[str]]]:
+    """
+    Build an Aho-Corasick automaton over a set of patterns.
+
+    Parameters:
+        patterns (Dict[str, List[str]]): Maps each pattern to the words credited when it matches.
+
+    Returns:
+        Tuple[List[Dict[str,int]], List[int], List[List[str]]]: The trie transitions of every state,
+        the failure link of every state, and the words credited on reaching each state (including
+        those of shorter patterns ending at the same place).
+    """
+    goto = [{}]
+    outputs = [[]]
+    for pattern, words in patterns.items():
+        state = 0
+        for char in pattern:
+            if char not in goto[state]:
+                goto[state][char] = len(goto)
+                goto.append({})
+                outputs.append([])
+            state = goto[state][char]
+        outputs[state].extend(words)
+
+    # Breadth-first, so the failure link of a state is finished before its children need it
+    fail = [0] * len(goto)
+    queue = deque(goto[0].values())
+    while queue:
+        state = queue.popleft()
+        for char, child in goto[state].items():
+            queue.append(child)
+            link = fail[state]
+            while link and char not in goto[link]:
+                link = fail[link]
+            fail[child] = goto[link].get(char, 0)
+            outputs[child] = outputs[child] + outputs[fail[child]]
+
+    return goto, fail, outputs
+
+def count_words(grid: List[str], words: List[str]) -> Dict[str, int]:
+    """
+    Count the occurrences of many words at once in all eight directions of the grid.
+
+    Every row, column and diagonal is extracted once and scanned a single time by an Aho-Corasick
+    automaton that holds each word and its reverse, so the cost is linear in the grid size no
+    matter how many words are searched. Each count equals count_word_occurrences for that word.
+
+    Parameters:
+        grid (List[str]): The 2D grid represented as a list of strings.
+        words (List[str]): The words to search for.
+
+    Returns:
+        Dict[str, int]: The number of occurrences of each word.
+    """
+    counts = {word: 0 for word in words}
+    patterns = defaultdict(list)
+    for word in counts:
+        if not word:
+            # The empty word trivially matches at every cell in every direction
+            counts[word] = len(grid) * len(grid[0]) * 8
+            continue
+        patterns[word].append(word)
+        patterns[word[::-1]].append(word)
+    if not patterns:
+        return counts
+
+    goto, fail, outputs = build_automaton(patterns)
+    for line in grid_lines(grid):
+        state = 0
+        for char in line:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for word in outputs[state]:
+                counts[word] += 1
+
+    return counts
+
+Template = Dict[Tuple[int, int], str]
+
+# Horizontal, vertical, and both diagonals, each read forwards and backwards
+WORD_DIRECTIONS = [
+    (0, 1), (0, -1),
+    (1, 0), (-1, 0),
+    (1, 1), (-1, -1),
+    (1, -1), (-1, 1),
+]
+
+# The X-MAS: two diagonal "MAS" crossing on a shared 'A'; its four rotations cover every reading direction
+XMAS_TEMPLATE: Template = {(-1, -1): 'M', (-1, 1): 'M', (0, 0): 'A', (1, -1): 'S', (1, 1): 'S'}
+
+def template_variants(template: Template, rotations: bool = True, reflections: bool = False) -> List[Template]:
+    """
+    Generate the distinct rotations and/or reflections of a template.
+
+    Parameters:
+        template (Template): A map from (row offset, col offset) to the expected character.
+        rotations (bool): Include the 90, 180 and 270 degree rotations.
+        reflections (bool): Include the mirror images (left-right) of every variant.
+
+    Returns:
+        List[Template]: The distinct variants, starting with the template itself.
+    """
+    variants = [template]
+    if rotations:
+        for _ in range(3):
+            variants.append({(dc, -dr): char for (dr, dc), char in variants[-1].items()})
+    if reflections:
+        variants += [{(dr, -dc): char for (dr, dc), char in variant.items()} for variant in variants]
+
+    distinct, seen = [], set()
+    for variant in variants:
+        key = frozenset(variant.items())
+        if key not in seen:
+            seen.add(key)
+            distinct.append(variant)
+    return distinct
+
+def word_templates(word: str) -> List[Template]:
+    """
+    Spell a word out as one template per reading direction.
+
+    Parameters:
+        word (str): The word.
+
+    Returns:
+        List[Template]: Eight templates, one per direction, each anchored at the word's first letter.
+    """
+    return [{(i * dr, i * dc): char for i, char in enumerate(word)} for dr, dc in WORD_DIRECTIONS]
+
+# Instrument counters for the cells probed by the word search and by the X-MAS templates
+WORD_PROBE_COUNTER = 'day4.word_start_probes'
+TEMPLATE_PROBE_COUNTER = 'day4.template_cells_probed'
+
+class TemplateMatcher:
+    """
+    Counts matches of 2D character templates over a whole grid at once.
+
+    The grid is turned into one bitboard (a Python int with one bit per cell) per character, with
+    rows padded so that horizontal offsets never wrap into the next row. A template matches at a
+    cell if, for every (offset, char) it contains, the char's bitboard shifted by the offset has
+    that cell's bit set, so each template is an AND of shifted bitboards. Templates are compiled
+    into references to distinct (offset, char) pairs, and each pair's shifted bitboard is computed
+    only once per grid no matter how many templates use it.
+    """
+
+    def __init__(self, templates: List[Template], counters: Optional[List[str]] = None):
+        """
+        Parameters:
+            templates (List[Template]): The templates to count, as maps from (row offset, col offset) to char.
+            counters (Optional[List[str]]): The Instrument counter each template's probed cells are
+                added to; defaults to TEMPLATE_PROBE_COUNTER for every template.
+        """
+        self.templates = templates
+        self.counters = counters or [TEMPLATE_PROBE_COUNTER] * len(templates)
+        self.terms = []
+        term_index = {}
+        self.compiled = []
+        for template in templates:
+            refs = []
+            for offset, char in template.items():
+                key = (offset, char)
+                if key not in term_index:
+                    term_index[key] = len(self.terms)
+                    self.terms.append(key)
+                refs.append(term_index[key])
+            self.compiled.append(refs)
+        self.pad = max((abs(dc) for (_, dc), _ in self.terms), default=0)
+
+    def count(self, grid: List[str]) -> List[int]:
+        """
+        Count the matches of every template in the grid.
+
+        Parameters:
+            grid (List[str]): The 2D grid represented as a list of strings.
+
+        Returns:
+            List[int]: The number of cells at which each template matches, in template order.
+        """
+        if not grid or not grid[0]:
+            return [0] * len(self.templates)
+        rows, cols = len(grid), len(grid[0])
+        stride = cols + self.pad
+        padding = '\0' * self.pad
+        text = ''.join(row + padding for row in grid)
+
+        boards = {}
+        clear = {ord(c): '0' for c in set(text)}
+        for char in {char for _, char in self.terms}:
+            # Mark the char's cells with '1' and read the string as a binary number, lowest cell first
+            bits = text.translate({**clear, ord(char): '1'})
+            boards[char] = int(bits[::-1], 2)
+        # Only real cells can anchor a match
+        cells = int(('0' * self.pad + '1' * cols) * rows, 2)
+
+        shifted = []
+        for (dr, dc), char in self.terms:
+            shift = dr * stride + dc
+            board = boards[char]
+            shifted.append(board >> shift if shift >= 0 else board << -shift)
+
+        counts = []
+        for refs in self.compiled:
+            matches = cells
+            for ref in refs:
+                matches &= shifted[ref]
+            counts.append(bin(matches).count('1'))
+
+        if Instrument.ENABLED:
+            for name in self.counters:
+                Instrument.count(name, rows * cols)
+        return counts
+
 def count_xmas_pattern(grid: List[str]) -> int:
     """
     Count occurrences of a specific X-MAS pattern around the letter 'A'.
@@ -51,37 +335,27 @@ def count_xmas_pattern(grid: List[str]) -> int:
     Returns:
         int: The total number of occurrences of the X-MAS pattern.
     """
-    rows, cols = len(grid), len(grid[0])
-    total_count = 0
+    return sum(TemplateMatcher(template_variants(XMAS_TEMPLATE)).count(grid))
 
-    def is_valid(r: int, c: int) -> bool:
-        return 0 <= r < rows and 0 <= c < cols
-
-    def check_xmas_pattern(center_row: int, center_col: int) -> int:
-        if not is_valid(center_row, center_col) or grid[center_row][center_col] != "A":
-            return 0
-
-        # Each pattern is a list of ((dr, dc), char) tuples
-        patterns = [
-            [((-1, -1), 'M'), ((-1, 1), 'M'), ((1, -1), 'S'), ((1, 1), 'S')],
-            [((-1, -1), 'S'), ((-1, 1), 'S'), ((1, -1), 'M'), ((1, 1), 'M')],
-            [((-1, -1), 'S'), ((-1, 1), 'M'), ((1, -1), 'S'), ((1, 1), 'M')],
-            [((-1, -1), 'M'), ((-1, 1), 'S'), ((1, -1), 'M'), ((1, 1), 'S')]
-        ]
-
-        valid_patterns = 0
-        for pattern in patterns:
-            if all(is_valid(center_row + dr, center_col + dc)
-                   and grid[center_row + dr][center_col + dc] == char
-                   for (dr, dc), char in pattern):
-                valid_patterns += 1
-        return valid_patterns
-
-    for r in range(rows):
-        for c in range(cols):
-            total_count += check_xmas_pattern(r, c)
+def solve_grid(grid: List[str], word: str = "XMAS") -> Tuple[int, int]:
+    """
+    Count the word and the X-MAS pattern with a single TemplateMatcher.
 
-    return total_count
+    Both parts look for the same letters, so one matcher builds each letter's bitboard once and
+    shares shifted bitboards between the word's directions and the X-MAS rotations.
+
+    Parameters:
+        grid (List[str]): The 2D grid represented as a list of strings.
+        word (str): The word to search for in part 1.
+
+    Returns:
+        Tuple[int,int]: The occurrences of the word, and the occurrences of the X-MAS pattern.
+    """
+    words = word_templates(word)
+    variants = template_variants(XMAS_TEMPLATE)
+    counters = [WORD_PROBE_COUNTER] * len(words) + [TEMPLATE_PROBE_COUNTER] * len(variants)
+    counts = TemplateMatcher(words + variants, counters).count(grid)
+    return sum(counts[:len(words)]), sum(counts[len(words):])
 
 def read_grid_from_file(filename: str) -> List[str]:
     """
@@ -93,22 +367,158 @@ def read_grid_from_file(filename: str) -> List[str]:
     Returns:
         List[str]: The grid as a list of strings.
     """
-    with open(filename, 'r') as file:
-        return [line.strip() for line in file]
+    with open_input(filename) as data:
+        return text_rows(data)
+
+def solve(filename: str) -> Tuple[int, int]:
+    """
+    Solve both parts from a single parse of the input file.
+
+    Parameters:
+        filename (str): The path to the input file.
+
+    Returns:
+        Tuple[int,int]: The answers to part 1 and part 2.
+    """
+    with Instrument.phase('day4.parse'):
+        grid = read_grid_from_file(filename)
+    with Instrument.phase('day4.solve'):
+        return solve_grid(grid)
+
+def grid_file_shape(mapped: Buffer) -> Tuple[int, int, int]:
+    """
+    Work out the layout of a memory-mapped grid file with fixed-width rows.
+
+    Parameters:
+        mapped (Buffer): The mapped file.
+
+    Returns:
+        Tuple[int,int,int]: The number of rows, the number of columns, and the byte stride between rows.
+    """
+    size = len(mapped)
+    newline = mapped.find(b'\n')
+    if newline == -1:
+        return (1, size, size) if size else (0, 0, 0)
+    stride = newline + 1
+    cols = newline - 1 if newline and mapped[newline - 1] == ord('\r') else newline
+    return -(-size // stride), cols, stride
+
+def read_band(mapped: Buffer, stride: int, start: int, stop: int) -> List[str]:
+    """
+    Read rows [start, stop) of a memory-mapped grid file.
+
+    Parameters:
+        mapped (Buffer): The mapped file.
+        stride (int): The byte stride between rows.
+        start (int): The first row to read.
+        stop (int): One past the last row to read.
+
+    Returns:
+        List[str]: The rows as strings.
+    """
+    return mapped[start * stride:stop * stride].decode('latin-1').splitlines()
+
+def count_band(filename: str, counter: Callable[[List[str]], int], start: int, stop: int, halo: int) -> int:
+    """
+    Count the matches whose top row lies in rows [start, stop) of a grid file.
+
+    The band is read together with `halo` extra rows below it, so matches that start in the band
+    but cross its lower edge are found. Matches that start inside the halo belong to the next band,
+    and are removed by subtracting a count over the halo rows alone.
+
+    Parameters:
+        filename (str): The path to the grid file.
+        counter (Callable[[List[str]], int]): Counts all matches in a list of rows.
+        start (int): The first row of the band.
+        stop (int): One past the last row of the band.
+        halo (int): The height of a match minus one.
+
+    Returns:
+        int: The number of matches anchored in the band.
+    """
+    with open_input(filename) as mapped:
+        rows, _, stride = grid_file_shape(mapped)
+        end = min(stop + halo, rows)
+        total = counter(read_band(mapped, stride, start, end))
+        if end > stop:
+            total -= counter(read_band(mapped, stride, stop, end))
+        return total
+
+def count_in_bands(filename: str, counter: Callable[[List[str]], int], halo: int,
+                   band_rows: int = 1024, workers: int = 1) -> int:
+    """
+    Count matches in a grid file band by band, so memory stays bounded by the band size.
+
+    The file is memory-mapped and cut into bands of `band_rows` rows. Each match is counted by the
+    band holding its top row, so matches crossing a band boundary are counted exactly once.
+
+    Parameters:
+        filename (str): The path to the grid file, with rows of equal length.
+        counter (Callable[[List[str]], int]): Counts all matches in a list of rows; must be picklable
+            when workers > 1.
+        halo (int): The height of a match minus one.
+        band_rows (int): The number of rows per band.
+        workers (int): Number of worker processes; 1 scans the bands in this process.
+
+    Returns:
+        int: The total number of matches in the grid.
+    """
+    with open_input(filename) as mapped:
+        rows, cols, _ = grid_file_shape(mapped)
+    if rows == 0 or cols == 0:
+        return 0
+
+    halo = max(halo, 0)
+    starts = range(0, rows, band_rows)
+    stops = [min(start + band_rows, rows) for start in starts]
+    if workers > 1 and len(starts) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            counts = pool.map(count_band, repeat(filename), repeat(counter), starts, stops, repeat(halo))
+            return sum(counts)
+    return sum(count_band(filename, counter, start, stop, halo) for start, stop in zip(starts, stops))
+
+def count_word_occurrences_in_file(filename: str, word: str, band_rows: int = 1024, workers: int = 1) -> int:
+    """
+    Streaming version of count_word_occurrences for grid files too large to load at once.
+
+    Parameters:
+        filename (str): The path to the grid file.
+        word (str): The word to search for.
+        band_rows (int): The number of rows per band.
+        workers (int): Number of worker processes.
+
+    Returns:
+        int: The total number of occurrences of the word in the grid.
+    """
+    counter = partial(count_word_occurrences, word=word)
+    return count_in_bands(filename, counter, len(word) - 1, band_rows, workers)
+
+def count_xmas_pattern_in_file(filename: str, band_rows: int = 1024, workers: int = 1) -> int:
+    """
+    Streaming version of count_xmas_pattern for grid files too large to load at once.
+
+    Parameters:
+        filename (str): The path to the grid file.
+        band_rows (int): The number of rows per band.
+        workers (int): Number of worker processes.
+
+    Returns:
+        int: The total number of occurrences of the X-MAS pattern.
+    """
+    height = max(dr for dr, _ in XMAS_TEMPLATE) - min(dr for dr, _ in XMAS_TEMPLATE) + 1
+    return count_in_bands(filename, count_xmas_pattern, height - 1, band_rows, workers)
 
-def main():
+def main(file_path: str = data_path(4)):
     """Execute Day 4 puzzle solution."""
-    file_path = '../data/Day4.txt'
-    grid = read_grid_from_file(file_path)
+    # Both parts share one pass of the template matcher over the grid
+    part1_result, part2_result = solve(file_path)
 
     # Part 1
     word = "XMAS"
-    part1_result = count_word_occurrences(grid, word)
     print(f"Day 4 - Part 1: Total occurrences of '{word}': {part1_result}")
 
     # Part 2
-    part2_result = count_xmas_pattern(grid)
     print(f"Day 4 - Part 2: Total occurrences of X-MAS pattern: {part2_result}")
 
 if __name__ == "__main__":
-    main()
+    main(*sys.argv[1:2])
@@ -1,7 +1,75 @@
+import sys
 from collections import defaultdict, deque
-from typing import List, Tuple
+from typing import Iterable, Iterator, List, Optional, Set, Tuple
 
-def parse_input(filename: str) -> Tuple[List[Tuple[int,int]], List[List[int]]]:
+import Instrument
+from Input import data_path, int_rows, open_input, section_spans
+
+class RuleSet:
+    """
+    Ordering rules indexed by page, so checks only touch the pages of one update.
+
+    Each rule (x, y) means page x must be printed before page y. The rules are stored as a set
+    of successors per page, which makes looking up the rules between two pages a hash lookup.
+    """
+
+    def __init__(self, rules: Iterable[Tuple[int,int]] = ()):
+        """
+        Parameters:
+            rules (Iterable[Tuple[int,int]]): Initial (x, y) rules.
+        """
+        self._successors = defaultdict(set)
+        self._count = 0
+        for x, y in rules:
+            self.add(x, y)
+
+    def add(self, x: int, y: int) -> bool:
+        """Add the rule that page x must come before page y. Returns False if it already existed."""
+        successors = self._successors[x]
+        if y in successors:
+            return False
+        successors.add(y)
+        self._count += 1
+        return True
+
+    def remove(self, x: int, y: int) -> bool:
+        """Remove the rule that page x must come before page y. Returns False if it did not exist."""
+        successors = self._successors.get(x)
+        if successors is None or y not in successors:
+            return False
+        successors.remove(y)
+        self._count -= 1
+        return True
+
+    def successors(self, page: int) -> Set[int]:
+        """Return the pages that must come after the given page."""
+        return self._successors.get(page, set())
+
+    def must_precede(self, x: int, y: int) -> bool:
+        """Return True if there is a rule that page x must come before page y."""
+        return y in self.successors(x)
+
+    def relevant_rules(self, pages: Set[int]) -> List[Tuple[int,int]]:
+        """
+        Return the rules whose pages both appear in the given set.
+
+        Parameters:
+            pages (Set[int]): The pages of an update.
+
+        Returns:
+            List[Tuple[int,int]]: The (x, y) rules between those pages.
+        """
+        return [(x, y) for x in pages for y in self.successors(x) & pages]
+
+    def __iter__(self) -> Iterator[Tuple[int,int]]:
+        for x, successors in self._successors.items():
+            for y in successors:
+                yield x, y
+
+    def __len__(self) -> int:
+        return self._count
+
+def parse_input(filename: str) -> Tuple[RuleSet, List[List[int]]]:
     """
     Parse the puzzle input file which contains ordering rules followed by updates.
 
@@ -9,49 +77,55 @@ def parse_input(filename: str) -> Tuple[List[Tuple[int,int]], List[List[int]]]:
         filename (str): The path to the input file.
 
     Returns:
-        Tuple[List[Tuple[int,int]], List[List[int]]]: A tuple containing the rules
-        (as a list of (x, y) tuples) and updates (as a list of lists of page numbers).
+        Tuple[RuleSet, List[List[int]]]: A tuple containing the rules (indexed as a RuleSet)
+        and updates (as a list of lists of page numbers).
     """
-    with open(filename, "r") as f:
-        lines = [line.strip() for line in f]
+    with open_input(filename) as data:
+        # Updates run from the first blank line to the end; blank lines among them are skipped below
+        rule_span, update_span = section_spans(data)[:2]
+        rule_rows = int_rows(data, b'|', *rule_span)
+        update_rows = int_rows(data, b',', update_span[0])
 
-    blank_index = lines.index('')
-    rule_lines = lines[:blank_index]
-    update_lines = lines[blank_index+1:]
+    rules = RuleSet()
+    for x, y in rule_rows:
+        rules.add(x, y)
 
-    rules = []
-    for line in rule_lines:
-        if line:
-            x, y = line.split('|')
-            x, y = x.strip(), y.strip()
-            rules.append((int(x), int(y)))
-
-    updates = []
-    for line in update_lines:
-        if line:
-            pages = [int(x.strip()) for x in line.split(',')]
-            updates.append(pages)
+    updates = [pages for pages in update_rows if pages]
 
     return rules, updates
 
-def is_correctly_ordered(update: List[int], rules: List[Tuple[int,int]]) -> bool:
+def is_correctly_ordered(update: List[int], rules: RuleSet) -> bool:
     """
     Check if an update's pages are in the correct order based on the given rules.
 
+    The update is out of order if some page must come before a page already seen earlier in it.
+
     Parameters:
         update (List[int]): The list of page numbers in the update.
-        rules (List[Tuple[int,int]]): The ordering rules as (x, y) pairs.
+        rules (RuleSet): The ordering rules.
 
     Returns:
         bool: True if the update is correctly ordered, False otherwise.
     """
-    page_positions = {page: i for i, page in enumerate(update)}
-    for (x, y) in rules:
-        if x in page_positions and y in page_positions:
-            if page_positions[x] > page_positions[y]:
-                return False
+    seen = set()
+    for page in update:
+        if not rules.successors(page).isdisjoint(seen):
+            if Instrument.ENABLED:
+                _count_rules_scanned(rules, seen, page)
+            return False
+        seen.add(page)
+    if Instrument.ENABLED:
+        _count_rules_scanned(rules, seen)
     return True
 
+def _count_rules_scanned(rules: RuleSet, checked: Set[int], failed: Optional[int] = None) -> None:
+    """Record the rules is_correctly_ordered looked at for the pages it checked before stopping."""
+    scanned = sum(len(rules.successors(page)) for page in checked)
+    if failed is not None:
+        scanned += len(rules.successors(failed))
+    Instrument.count('day5.updates_checked')
+    Instrument.count('day5.rules_scanned', scanned)
+
 def topological_sort(pages: set, relevant_rules: List[Tuple[int,int]]) -> List[int]:
     """
     Perform a topological sort on the given pages based on the relevant_rules.
@@ -82,12 +156,12 @@ def topological_sort(pages: set, relevant_rules: List[Tuple[int,int]]) -> List[i
 
     return sorted_order
 
-def part_one(rules: List[Tuple[int,int]], updates: List[List[int]]) -> int:
+def part_one(rules: RuleSet, updates: List[List[int]]) -> int:
     """
     Sum the middle page of each correctly-ordered update.
 
     Parameters:
-        rules (List[Tuple[int,int]]): The ordering rules.
+        rules (RuleSet): The ordering rules.
         updates (List[List[int]]): The list of updates.
 
     Returns:
@@ -100,41 +174,221 @@ def part_one(rules: List[Tuple[int,int]], updates: List[List[int]]) -> int:
             total += upd[middle_index]
     return total
 
-def part_two(rules: List[Tuple[int,int]], updates: List[List[int]]) -> int:
+def part_two(rules: RuleSet, updates: List[List[int]]) -> int:
     """
     For each incorrectly-ordered update, find the correct order and sum their middle pages.
 
     Parameters:
-        rules (List[Tuple[int,int]]): The ordering rules.
+        rules (RuleSet): The ordering rules.
         updates (List[List[int]]): The list of updates.
 
     Returns:
         int: The sum of the middle pages of all re-ordered incorrect updates.
     """
-    incorrect_updates = [upd for upd in updates if not is_correctly_ordered(upd, rules)]
-
     total = 0
-    for upd in incorrect_updates:
-        page_set = set(upd)
-        relevant_rules = [(x, y) for (x, y) in rules if x in page_set and y in page_set]
+    for upd in updates:
+        if not is_correctly_ordered(upd, rules):
+            page_set = set(upd)
+            sorted_upd = topological_sort(page_set, rules.relevant_rules(page_set))
+            middle_index = len(sorted_upd) // 2
+            total += sorted_upd[middle_index]
+    return total
 
-        sorted_upd = topological_sort(page_set, relevant_rules)
-        middle_index = len(sorted_upd) // 2
-        total += sorted_upd[middle_index]
+def solve_updates(rules: RuleSet, updates: List[List[int]]) -> Tuple[int, int]:
+    """
+    Compute both answers in one pass, checking the order of each update only once.
 
-    return total
+    Parameters:
+        rules (RuleSet): The ordering rules.
+        updates (List[List[int]]): The list of updates.
+
+    Returns:
+        Tuple[int,int]: The sum of the middle pages of the correctly-ordered updates, and of the
+        re-ordered incorrect ones.
+    """
+    correct_total = 0
+    reordered_total = 0
+    for upd in updates:
+        if is_correctly_ordered(upd, rules):
+            correct_total += upd[len(upd) // 2]
+        else:
+            page_set = set(upd)
+            sorted_upd = topological_sort(page_set, rules.relevant_rules(page_set))
+            reordered_total += sorted_upd[len(sorted_upd) // 2]
+    return correct_total, reordered_total
+
+def solve(filename: str) -> Tuple[int, int]:
+    """
+    Solve both parts from a single parse of the input file.
+
+    Parameters:
+        filename (str): The path to the input file.
+
+    Returns:
+        Tuple[int,int]: The answers to part 1 and part 2.
+    """
+    with Instrument.phase('day5.parse'):
+        rules, updates = parse_input(filename)
+    with Instrument.phase('day5.solve'):
+        return solve_updates(rules, updates)
+
+def build_precedence_matrix(rules: RuleSet, size: int):
+    """
+    Build a dense boolean matrix of the rules, indexed by page number.
+
+    Requires NumPy.
+
+    Parameters:
+        rules (RuleSet): The ordering rules.
+        size (int): One more than the largest page number to cover.
+
+    Returns:
+        numpy.ndarray: A (size, size) matrix where [x, y] is True if page x must come before page y.
+    """
+    import numpy as np
+
+    matrix = np.zeros((size, size), dtype=bool)
+    pairs = np.array([(x, y) for x, y in rules if x < size and y < size], dtype=np.intp).reshape(-1, 2)
+    matrix[pairs[:, 0], pairs[:, 1]] = True
+    return matrix
+
+def evaluate_updates_bulk(rules: RuleSet, updates: List[List[int]]) -> Tuple[int,int]:
+    """
+    Compute the part one and part two totals for a large batch of updates in one vectorized pass.
+
+    Updates are grouped by length into 2D arrays, and the precedence bits between every pair of
+    positions are gathered from the rule matrix at once. An update is correctly ordered if no page
+    must come before a page earlier in it. For reordering, a page's rank is the number of pages in
+    the update that must come before it, and the middle page of the reordered update is the one
+    with rank len // 2. Updates whose pages the rules do not rank uniquely fall back to
+    topological_sort, so the totals always match part_one and part_two.
+
+    Requires NumPy.
+
+    Parameters:
+        rules (RuleSet): The ordering rules.
+        updates (List[List[int]]): The list of updates.
+
+    Returns:
+        Tuple[int,int]: The part one and part two totals.
+    """
+    import numpy as np
+
+    by_length = defaultdict(list)
+    for upd in updates:
+        if upd:
+            by_length[len(upd)].append(upd)
+    if not by_length:
+        return 0, 0
+
+    size = max(max(upd) for group in by_length.values() for upd in group) + 1
+    matrix = build_precedence_matrix(rules, size)
+
+    part_one_total = 0
+    part_two_total = 0
+    for length, group in by_length.items():
+        pages = np.array(group, dtype=np.intp)
+        middle = length // 2
+        # before[k, i, j] is True if page i of update k must come before its page j
+        before = matrix[pages[:, :, None], pages[:, None, :]]
+        later_first = np.tril(np.ones((length, length), dtype=bool), -1)
+        valid = ~(before & later_first).any(axis=(1, 2))
+        part_one_total += int(pages[valid, middle].sum())
+
+        bad_pages = pages[~valid]
+        ranks = before[~valid].sum(axis=1)
+        ranked = (np.sort(ranks, axis=1) == np.arange(length)).all(axis=1)
+        middle_pos = (ranks == middle).argmax(axis=1)
+        middle_pages = bad_pages[np.arange(len(bad_pages)), middle_pos]
+        part_two_total += int(middle_pages[ranked].sum())
+
+        for upd in bad_pages[~ranked].tolist():
+            page_set = set(upd)
+            sorted_upd = topological_sort(page_set, rules.relevant_rules(page_set))
+            part_two_total += sorted_upd[len(sorted_upd) // 2]
+
+    return part_one_total, part_two_total
+
+class UpdateValidator:
+    """
+    Long-lived validator that keeps the part one and part two totals up to date as rules and
+    updates arrive.
+
+    Every submitted update is evaluated once and its contribution to either total is remembered.
+    A rule only affects updates that contain both of its pages, so adding or removing a rule
+    re-evaluates just those updates, found through an index from page to update.
+    """
+
+    def __init__(self, rules: Iterable[Tuple[int,int]] = ()):
+        """
+        Parameters:
+            rules (Iterable[Tuple[int,int]]): Initial (x, y) rules.
+        """
+        self.rules = RuleSet(rules)
+        self.updates = []
+        self.part_one_total = 0
+        self.part_two_total = 0
+        self._contributions = []
+        self._updates_by_page = defaultdict(set)
+
+    def _evaluate(self, update: List[int]) -> Tuple[int,int]:
+        """Return the update's contribution to the part one and part two totals."""
+        if is_correctly_ordered(update, self.rules):
+            return update[len(update) // 2], 0
+        page_set = set(update)
+        sorted_upd = topological_sort(page_set, self.rules.relevant_rules(page_set))
+        return 0, sorted_upd[len(sorted_upd) // 2]
+
+    def _reevaluate(self, update_ids: Iterable[int]) -> None:
+        """Recompute the contributions of the given updates and adjust the totals."""
+        for update_id in update_ids:
+            old_one, old_two = self._contributions[update_id]
+            new_one, new_two = self._evaluate(self.updates[update_id])
+            self.part_one_total += new_one - old_one
+            self.part_two_total += new_two - old_two
+            self._contributions[update_id] = (new_one, new_two)
+
+    def submit_update(self, update: List[int]) -> int:
+        """
+        Evaluate a new update and add it to the running totals.
+
+        Parameters:
+            update (List[int]): The list of page numbers in the update.
+
+        Returns:
+            int: An id for the update, its index in `updates`.
+        """
+        update_id = len(self.updates)
+        self.updates.append(update)
+        for page in update:
+            self._updates_by_page[page].add(update_id)
+
+        part_one, part_two = self._evaluate(update)
+        self._contributions.append((part_one, part_two))
+        self.part_one_total += part_one
+        self.part_two_total += part_two
+        return update_id
+
+    def add_rule(self, x: int, y: int) -> None:
+        """Add the rule that page x must come before page y and update the affected totals."""
+        if self.rules.add(x, y):
+            self._reevaluate(self._updates_by_page.get(x, set()) & self._updates_by_page.get(y, set()))
+
+    def remove_rule(self, x: int, y: int) -> None:
+        """Remove the rule that page x must come before page y and update the affected totals."""
+        if self.rules.remove(x, y):
+            self._reevaluate(self._updates_by_page.get(x, set()) & self._updates_by_page.get(y, set()))
 
-def main():
+def main(file_path: str = data_path(5)):
     """Execute Day 5 puzzle solution."""
-    rules, updates = parse_input("../data/Day5.txt")
+    # Each update's order is checked once and serves both parts
+    part_one_result, part_two_result = solve(file_path)
 
     # Part One:
-    part_one_result = part_one(rules, updates)
     print("Day 5 - Part 1 Result:", part_one_result)
 
     # Part Two:
-    part_two_result = part_two(rules, updates)
     print("Day 5 - Part 2 Result:", part_two_result)
 
 if __name__ == "__main__":
-    main()
+    main(*sys.argv[1:2])
@@ -1,49 +1,84 @@
-from typing import List, Set, Tuple
+import sys
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import List, Optional, Tuple
 
-def turn_right(direction: str) -> str:
+import Instrument
+from Input import byte_grid, data_path, open_input
+
+# Directions are numbered clockwise so that turning right is (direction + 1) % 4
+DIRECTIONS = b'^>v<'
+UP, RIGHT, DOWN, LEFT = 0, 1, 2, 3
+
+OBSTACLE = ord('#')
+FREE = ord('.')
+
+def turn_right(direction: int) -> int:
     """
     Turn the guard's facing direction 90 degrees to the right.
 
     Parameters:
-        direction (str): One of '^', '>', 'v', '<' representing up, right, down, left.
+        direction (int): One of UP, RIGHT, DOWN, LEFT (0-3).
 
     Returns:
-        str: The new direction after turning right.
+        int: The new direction after turning right.
     """
-    if direction == '^':
-        return '>'
-    elif direction == '>':
-        return 'v'
-    elif direction == 'v':
-        return '<'
-    elif direction == '<':
-        return '^'
-    # Fallback shouldn't happen if input is correct
-    return direction
+    return (direction + 1) & 3
 
-def forward_pos(x: int, y: int, direction: str) -> Tuple[int, int]:
+def forward_pos(pos: int, direction: int, cols: int, cells: int) -> int:
     """
     Given a position and a direction, return the position one step forward.
 
+    Positions are flat indices into the grid (row * cols + col).
+
+    Parameters:
+        pos (int): Current position.
+        direction (int): Current direction.
+        cols (int): Number of columns in the grid.
+        cells (int): Total number of cells in the grid.
+
+    Returns:
+        int: The position one step forward, or -1 if that step leaves the map.
+    """
+    if direction == UP:
+        return pos - cols if pos >= cols else -1
+    elif direction == DOWN:
+        return pos + cols if pos + cols < cells else -1
+    elif direction == LEFT:
+        return pos - 1 if pos % cols != 0 else -1
+    return pos + 1 if pos % cols != cols - 1 else -1
+
+def read_map_from_file(filename: str) -> Tuple[bytes, int]:
+    """
+    Read the lab map as a flat bytes buffer.
+
     Parameters:
-        x (int): Current row.
-        y (int): Current column.
-        direction (str): Current direction '^', '>', 'v', or '<'.
+        filename (str): The path to the input file.
 
     Returns:
-        Tuple[int,int]: The position one step forward.
+        Tuple[bytes, int]: The map with rows concatenated, and the number of columns.
+    """
+    with open_input(filename) as data:
+        return byte_grid(data)
+
+def find_guard(grid: bytes) -> Tuple[int, int]:
     """
-    if direction == '^':
-        return x-1, y
-    elif direction == 'v':
-        return x+1, y
-    elif direction == '<':
-        return x, y-1
-    elif direction == '>':
-        return x, y+1
-    return x, y
+    Locate the guard on the map.
+
+    Parameters:
+        grid (bytes): The flat map.
 
-def simulate_patrol(grid: List[List[str]], start_x: int, start_y: int, start_dir: str) -> Tuple[Set[Tuple[int,int]], bool]:
+    Returns:
+        Tuple[int,int]: The guard's position and direction.
+    """
+    for direction, symbol in enumerate(DIRECTIONS):
+        pos = grid.find(symbol)
+        if pos != -1:
+            return pos, direction
+    raise ValueError("No guard found on the map")
+
+def simulate_patrol(grid: bytes, cols: int, start_pos: int, start_dir: int) -> Tuple[bytearray, bool]:
     """
     Simulate the guard's patrol until leaving the map.
 
@@ -52,36 +87,204 @@ def simulate_patrol(grid: List[List[str]], start_x: int, start_y: int, start_dir
     - Otherwise, move forward.
 
     Parameters:
-        grid (List[List[str]]): The map of the lab.
-        start_x (int): Starting row of the guard.
-        start_y (int): Starting column of the guard.
-        start_dir (str): Starting direction of the guard.
+        grid (bytes): The flat map of the lab.
+        cols (int): Number of columns in the grid.
+        start_pos (int): Starting position of the guard.
+        start_dir (int): Starting direction of the guard.
 
     Returns:
-        Tuple[Set[Tuple[int,int]], bool]: A set of visited positions and a boolean indicating if the guard left the map.
+        Tuple[bytearray, bool]: A mask with 1 for every visited position, and a boolean indicating
+        if the guard left the map (False if the patrol loops forever).
     """
-    rows = len(grid)
-    cols = len(grid[0])
+    cells = len(grid)
     direction = start_dir
-    x, y = start_x, start_y
+    pos = start_pos
 
-    visited_positions = {(x, y)}
+    visited_positions = bytearray(cells)
+    visited_positions[pos] = 1
+    turn_states = bytearray(cells * 4)
 
     while True:
-        fx, fy = forward_pos(x, y, direction)
+        forward = forward_pos(pos, direction, cols, cells)
         # Check if out of bounds
-        if fx < 0 or fx >= rows or fy < 0 or fy >= cols:
+        if forward == -1:
             # Guard leaves the map
+            if Instrument.ENABLED:
+                Instrument.count('day6.guard_turns', turn_states.count(1))
             return visited_positions, True
         # Check if blocked
-        if grid[fx][fy] == '#':
+        if grid[forward] == OBSTACLE:
+            state = pos * 4 + direction
+            if turn_states[state]:
+                if Instrument.ENABLED:
+                    Instrument.count('day6.guard_turns', turn_states.count(1))
+                return visited_positions, False
+            turn_states[state] = 1
             # Turn right
             direction = turn_right(direction)
         else:
-            x, y = fx, fy
-            visited_positions.add((x, y))
+            pos = forward
+            visited_positions[pos] = 1
+
+def build_jump_table(grid: bytes, cols: int) -> array:
+    """
+    Precompute, for every cell and direction, where the guard stops before the next obstacle.
+
+    The table is indexed by state (position * 4 + direction) and holds the position of the last
+    free cell before the next '#' in that direction, or -1 if the guard would walk off the map.
+
+    Parameters:
+        grid (bytes): The flat map of the lab.
+        cols (int): Number of columns in the grid.
+
+    Returns:
+        array: The stop position for every state, as a flat array of C ints.
+    """
+    cells = len(grid)
+    rows = cells // cols if cols else 0
+    table = array('i', [-1]) * (cells * 4)
+
+    for x in range(rows):
+        row_start = x * cols
+        # Moving left: remember the cell right of the closest obstacle seen so far
+        stop = -1
+        for pos in range(row_start, row_start + cols):
+            if grid[pos] == OBSTACLE:
+                stop = pos + 1
+            else:
+                table[pos * 4 + LEFT] = stop
+        # Moving right
+        stop = -1
+        for pos in range(row_start + cols - 1, row_start - 1, -1):
+            if grid[pos] == OBSTACLE:
+                stop = pos - 1
+            else:
+                table[pos * 4 + RIGHT] = stop
+
+    for y in range(cols):
+        # Moving up
+        stop = -1
+        for pos in range(y, cells, cols):
+            if grid[pos] == OBSTACLE:
+                stop = pos + cols
+            else:
+                table[pos * 4 + UP] = stop
+        # Moving down
+        stop = -1
+        for pos in range(cells - cols + y, -1, -cols):
+            if grid[pos] == OBSTACLE:
+                stop = pos - cols
+            else:
+                table[pos * 4 + DOWN] = stop
+
+    return table
+
+class PatrolSimulator:
+    """
+    Loop checker that jumps between obstacles and reuses one visited buffer for every simulation.
 
-def simulate_patrol_with_loop_check(grid: List[List[str]], start_x: int, start_y: int, start_dir: str) -> bool:
+    Only the states in which the guard turns are recorded. Each simulation stamps the states it
+    visits with the current generation number, so starting a new simulation only bumps the
+    generation instead of clearing or reallocating the buffer.
+    """
+
+    def __init__(self, table, cols: int):
+        """
+        Parameters:
+            table: The jump table from build_jump_table (any sequence of ints indexed by state).
+            cols (int): Number of columns in the grid.
+        """
+        self.table = table
+        self.cols = cols
+        self.stamps = bytearray(len(table))
+        self.generation = 0
+
+    def next_stop(self, pos: int, direction: int, obstruction: int = -1) -> int:
+        """
+        Look up where the guard stops when walking straight from pos, patched for one extra obstruction.
+
+        The extra obstruction only matters if it lies in the same row or column, ahead of the guard
+        and before the obstacle recorded in the table, in which case the guard stops right in front of it.
+
+        Parameters:
+            pos (int): Current position.
+            direction (int): Current direction.
+            obstruction (int): Position of an extra '#' not present in the table, or -1 for none.
+
+        Returns:
+            int: The position of the stop cell, or -1 if the guard leaves the map.
+        """
+        stop = self.table[pos * 4 + direction]
+        if obstruction == -1:
+            return stop
+
+        cols = self.cols
+        if direction == UP:
+            if obstruction < pos and (pos - obstruction) % cols == 0 and (stop == -1 or obstruction >= stop):
+                return obstruction + cols
+        elif direction == DOWN:
+            if obstruction > pos and (obstruction - pos) % cols == 0 and (stop == -1 or obstruction <= stop):
+                return obstruction - cols
+        elif direction == LEFT:
+            if obstruction < pos and obstruction // cols == pos // cols and (stop == -1 or obstruction >= stop):
+                return obstruction + 1
+        elif direction == RIGHT:
+            if obstruction > pos and obstruction // cols == pos // cols and (stop == -1 or obstruction <= stop):
+                return obstruction - 1
+        return stop
+
+    def leaves_map(self, start_pos: int, start_dir: int, obstruction: int = -1) -> bool:
+        """
+        Check whether the guard leaves the map, with an optional extra obstruction.
+
+        Parameters:
+            start_pos (int): Starting position.
+            start_dir (int): Starting direction.
+            obstruction (int): Position of an extra '#' placed on top of the table's map, or -1.
+
+        Returns:
+            bool: True if the guard leaves the map, False if stuck in a loop.
+        """
+        self.generation += 1
+        if self.generation == 256:
+            # Stamps only fit in a byte, so wipe the buffer once every 255 simulations
+            self.stamps[:] = bytes(len(self.stamps))
+            self.generation = 1
+        generation = self.generation
+        stamps = self.stamps
+
+        pos, direction = start_pos, start_dir
+        while True:
+            stop = self.next_stop(pos, direction, obstruction)
+            if stop == -1:
+                return True  # left the map, no loop
+
+            state = stop * 4 + direction
+            if stamps[state] == generation:
+                return False  # loop detected
+            stamps[state] = generation
+
+            pos = stop
+            direction = (direction + 1) & 3
+
+class CountingPatrolSimulator(PatrolSimulator):
+    """
+    PatrolSimulator that also counts the guard's jumps, for instrumented runs.
+
+    Counting lives in this subclass so the plain simulator's loop stays untouched when
+    instrumentation is off.
+    """
+
+    def __init__(self, table, cols: int):
+        super().__init__(table, cols)
+        self.jumps = 0
+
+    def next_stop(self, pos: int, direction: int, obstruction: int = -1) -> int:
+        self.jumps += 1
+        return super().next_stop(pos, direction, obstruction)
+
+def simulate_patrol_with_loop_check(grid: bytes, cols: int, start_pos: int, start_dir: int,
+                                    table: Optional[array] = None) -> bool:
     """
     Simulate the guard's patrol and check if the guard gets stuck in a loop.
 
@@ -89,87 +292,262 @@ def simulate_patrol_with_loop_check(grid: List[List[str]], start_x: int, start_y
     If the guard leaves the map, return True (no loop).
     If a loop is detected, return False.
 
+    Building a jump table takes a pass over every cell, which only pays off over many checks on
+    the same map, so without one the guard is stepped cell by cell and only its turns are recorded.
+
     Parameters:
-        grid (List[List[str]]): The map of the lab.
-        start_x (int): Starting row.
-        start_y (int): Starting column.
-        start_dir (str): Starting direction.
+        grid (bytes): The flat map of the lab.
+        cols (int): Number of columns in the grid.
+        start_pos (int): Starting position.
+        start_dir (int): Starting direction.
+        table (Optional[array]): A jump table for the grid from build_jump_table, or None to step.
 
     Returns:
         bool: True if the guard leaves the map, False if stuck in a loop.
     """
-    rows = len(grid)
-    cols = len(grid[0])
-    direction = start_dir
-    x, y = start_x, start_y
-
-    visited_states = {(x, y, direction)}
+    if table is not None:
+        return PatrolSimulator(table, cols).leaves_map(start_pos, start_dir)
 
+    cells = len(grid)
+    pos, direction = start_pos, start_dir
+    # A loop has to repeat a turn, so the packed turn states are all that needs remembering
+    turn_states = set()
     while True:
-        fx, fy = forward_pos(x, y, direction)
-        # Check if out of bounds
-        if fx < 0 or fx >= rows or fy < 0 or fy >= cols:
+        forward = forward_pos(pos, direction, cols, cells)
+        if forward == -1:
             return True  # left the map, no loop
+        if grid[forward] == OBSTACLE:
+            state = pos * 4 + direction
+            if state in turn_states:
+                return False  # loop detected
+            turn_states.add(state)
+            direction = turn_right(direction)
+        else:
+            pos = forward
+
+def find_obstruction_candidates(grid: bytes, cols: int, start_pos: int,
+                                start_dir: int) -> Tuple[List[Tuple[int, int, int]], int]:
+    """
+    Walk the guard's original route and collect every cell worth trying as a new obstruction.
+
+    Only cells on the route can change the guard's behaviour, and each is recorded the first
+    time the guard is about to enter it, together with the guard's state just in front of it.
+    The loop check for that cell can resume from this state, since the prefix of the route up to
+    that point is unaffected by the obstruction.
+
+    Parameters:
+        grid (bytes): The flat map of the lab, without the guard symbol.
+        cols (int): Number of columns in the grid.
+        start_pos (int): Starting position.
+        start_dir (int): Starting direction.
+
+    Returns:
+        Tuple[List[Tuple[int,int,int]], int]: The candidates as (position, direction, obstruction)
+        tuples, and the number of cells off the route that trap the guard regardless (non-zero
+        only if the original route is itself a loop).
+    """
+    cells = len(grid)
+    direction = start_dir
+    pos = start_pos
+    tried = bytearray(cells)
+    tried[pos] = 1
+    tried_count = 1
+    turn_states = bytearray(cells * 4)
+    candidates = []
+    # Steps into cells entered before; with one candidate per first entry they add up to the route's length
+    revisits = 0
+
+    while True:
+        forward = forward_pos(pos, direction, cols, cells)
+        if forward == -1:
+            if Instrument.ENABLED:
+                _count_route(turn_states, len(candidates) + revisits)
+            return candidates, 0
 
-        if grid[fx][fy] == '#':
+        if grid[forward] == OBSTACLE:
+            state = pos * 4 + direction
+            if turn_states[state]:
+                if Instrument.ENABLED:
+                    _count_route(turn_states, len(candidates) + revisits)
+                # The original route is itself a loop, so obstructions off the route keep it looping
+                return candidates, grid.count(FREE) - tried_count
+            turn_states[state] = 1
             direction = turn_right(direction)
+            continue
+
+        if not tried[forward]:
+            tried[forward] = 1
+            tried_count += 1
+            candidates.append((pos, direction, forward))
         else:
-            x, y = fx, fy
+            revisits += 1
+        pos = forward
 
-        state = (x, y, direction)
-        if state in visited_states:
-            return False  # loop detected
-        visited_states.add(state)
+def _count_route(turn_states: bytearray, steps: int) -> None:
+    """Record the turns and steps the guard took on a walk of its original route."""
+    Instrument.count('day6.guard_turns', turn_states.count(1))
+    Instrument.count('day6.guard_steps', steps)
 
-def main():
-    """Execute Day 6 puzzle solution."""
-    with open("../data/Day6.txt", "r") as f:
-        grid = [list(line.rstrip('\n')) for line in f]
-
-    rows = len(grid)
-    cols = len(grid[0]) if rows > 0 else 0
-
-    # Find guard starting position and direction
-    directions = ['^','>','v','<']
-    start_x, start_y, start_dir = None, None, None
-    for i in range(rows):
-        for j in range(cols):
-            if grid[i][j] in directions:
-                start_x, start_y = i, j
-                start_dir = grid[i][j]
-                break
-        if start_dir is not None:
-            break
+def count_loops_in_batch(simulator: PatrolSimulator, batch: List[Tuple[int, int, int]]) -> int:
+    """
+    Count how many candidates from find_obstruction_candidates trap the guard in a loop.
+
+    Parameters:
+        simulator (PatrolSimulator): A simulator for the grid.
+        batch (List[Tuple[int,int,int]]): Candidate obstructions with their resume states.
+
+    Returns:
+        int: The number of candidates that cause a loop.
+    """
+    loop_count = 0
+    for pos, direction, obstruction in batch:
+        if not simulator.leaves_map(pos, direction, obstruction):
+            loop_count += 1
+
+    Instrument.count('day6.loop_checks', len(batch))
+    Instrument.count('day6.loops_found', loop_count)
+    return loop_count
+
+# Per-process state for the parallel search, set up by _init_worker
+_worker_shm = None
+_worker_simulator = None
+
+def _init_worker(shm_name: str, cols: int) -> None:
+    """Attach a pool worker to the jump table shared by the parent process."""
+    global _worker_shm, _worker_simulator
+    _worker_shm = shared_memory.SharedMemory(name=shm_name)
+    _worker_simulator = PatrolSimulator(_worker_shm.buf.cast('i'), cols)
+
+def _count_loops_in_worker(batch: List[Tuple[int, int, int]]) -> int:
+    """Run count_loops_in_batch against the shared jump table of this worker."""
+    return count_loops_in_batch(_worker_simulator, batch)
+
+def count_loop_obstructions_parallel(table: array, cols: int, candidates: List[Tuple[int, int, int]],
+                                     workers: int) -> int:
+    """
+    Count looping candidates across a process pool.
+
+    The jump table is copied once into a shared memory block that every worker maps read-only,
+    so only the small candidate batches are sent to the workers.
+
+    Parameters:
+        table (array): The jump table for the grid.
+        cols (int): Number of columns in the grid.
+        candidates (List[Tuple[int,int,int]]): Candidate obstructions with their resume states.
+        workers (int): Number of worker processes.
+
+    Returns:
+        int: The number of candidates that cause a loop.
+    """
+    size = table.itemsize * len(table)
+    shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    try:
+        shm.buf[:size] = table.tobytes()
+        # A few batches per worker keeps the load balanced when some loop checks run long
+        batch_size = max(1, -(-len(candidates) // (workers * 4)))
+        batches = [candidates[i:i + batch_size] for i in range(0, len(candidates), batch_size)]
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(shm.name, cols)) as pool:
+            return sum(pool.map(_count_loops_in_worker, batches))
+    finally:
+        shm.close()
+        shm.unlink()
+
+def solve_patrol(grid: bytes, cols: int, start_pos: int, start_dir: int,
+                 table: Optional[array] = None, workers: int = 1) -> Tuple[int, int]:
+    """
+    Compute both answers from one walk of the guard's original route.
+
+    The walk in find_obstruction_candidates records every cell of the route exactly once, as a
+    candidate obstruction for part 2, except for the starting cell, so it also counts the
+    distinct positions the guard visits.
 
+    Parameters:
+        grid (bytes): The flat map of the lab, without the guard symbol.
+        cols (int): Number of columns in the grid.
+        start_pos (int): Starting position.
+        start_dir (int): Starting direction.
+        table (Optional[array]): A prebuilt jump table for the grid.
+        workers (int): Number of worker processes; 1 runs the search in this process.
+
+    Returns:
+        Tuple[int,int]: The number of distinct positions visited, and the number of obstruction
+        positions that cause a loop.
+    """
+    if table is None:
+        table = build_jump_table(grid, cols)
+
+    candidates, off_route_loops = find_obstruction_candidates(grid, cols, start_pos, start_dir)
+    visited_count = len(candidates) + 1
+    if workers > 1 and len(candidates) > 1:
+        loop_count = count_loop_obstructions_parallel(table, cols, candidates, workers)
+    elif not Instrument.ENABLED:
+        loop_count = count_loops_in_batch(PatrolSimulator(table, cols), candidates)
+    else:
+        simulator = CountingPatrolSimulator(table, cols)
+        loop_count = count_loops_in_batch(simulator, candidates)
+        Instrument.count('day6.guard_jumps', simulator.jumps)
+    return visited_count, off_route_loops + loop_count
+
+def count_loop_obstructions(grid: bytes, cols: int, start_pos: int, start_dir: int,
+                            table: Optional[array] = None, workers: int = 1) -> int:
+    """
+    Count the positions where a single new obstruction traps the guard in a loop.
+
+    Parameters:
+        grid (bytes): The flat map of the lab, without the guard symbol.
+        cols (int): Number of columns in the grid.
+        start_pos (int): Starting position.
+        start_dir (int): Starting direction.
+        table (Optional[array]): A prebuilt jump table for the grid.
+        workers (int): Number of worker processes; 1 runs the search in this process.
+
+    Returns:
+        int: The number of obstruction positions that cause a loop.
+    """
+    return solve_patrol(grid, cols, start_pos, start_dir, table, workers)[1]
+
+def parse_input(filename: str) -> Tuple[bytes, int, int, int]:
+    """
+    Read the lab map and take the guard off it.
+
+    Parameters:
+        filename (str): The path to the input file.
+
+    Returns:
+        Tuple[bytes,int,int,int]: The flat map with the guard's cell replaced by '.', the number
+        of columns, and the guard's starting position and direction.
+    """
+    grid, cols = read_map_from_file(filename)
+    start_pos, start_dir = find_guard(grid)
     # Replace the guard symbol with '.' for uniformity
-    grid[start_x][start_y] = '.'
+    return grid[:start_pos] + b'.' + grid[start_pos + 1:], cols, start_pos, start_dir
+
+def solve(filename: str) -> Tuple[int, int]:
+    """
+    Solve both parts from a single parse of the input file and one walk of the route.
+
+    Parameters:
+        filename (str): The path to the input file.
+
+    Returns:
+        Tuple[int,int]: The answers to part 1 and part 2.
+    """
+    with Instrument.phase('day6.parse'):
+        parsed = parse_input(filename)
+    with Instrument.phase('day6.solve'):
+        return solve_patrol(*parsed)
+
+def main(file_path: str = data_path(6)):
+    """Execute Day 6 puzzle solution."""
+    # The route is walked once: its cells are the answer to part 1 and the candidates for part 2
+    part_one_result, loop_count = solve(file_path)
 
     # Part One
-    visited_positions, _ = simulate_patrol(grid, start_x, start_y, start_dir)
-    part_one_result = len(visited_positions)
     print("Day 6 - Part 1 Result:", part_one_result)
 
     # Part Two
-    # Test placing a new obstruction at each '.' position (except the start)
-    loop_count = 0
-    for i in range(rows):
-        for j in range(cols):
-            # Skip starting position and only consider '.'
-            if (i, j) == (start_x, start_y):
-                continue
-            if grid[i][j] != '.':
-                continue
-
-            # Temporarily place obstruction
-            grid[i][j] = '#'
-            left_map = simulate_patrol_with_loop_check(grid, start_x, start_y, start_dir)
-            if not left_map:
-                loop_count += 1
-
-            # Restore cell
-            grid[i][j] = '.'
-
     print("Day 6 - Part 2 Result:", loop_count)
 
 if __name__ == "__main__":
-    main()
+    main(*sys.argv[1:2])
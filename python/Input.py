@@ -0,0 +1,252 @@
+import mmap
+import os
+import re
+import stat
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Tuple, Union
+
+DATA_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data'))
+
+Buffer = Union[bytes, mmap.mmap]
+
+def data_path(day: int) -> str:
+    """
+    Return the path of the bundled puzzle input for a day, independent of the working directory.
+
+    Parameters:
+        day (int): The day number.
+
+    Returns:
+        str: The path to data/DayN.txt.
+    """
+    return os.path.join(DATA_DIR, f"Day{day}.txt")
+
+@contextmanager
+def open_input(filename: str) -> Iterator[Buffer]:
+    """
+    Memory-map an input file for reading.
+
+    The mapping can be handed straight to `re`, `memoryview` or `numpy.frombuffer` without copying,
+    and the line-based parsers below copy it out one block of lines at a time.
+    Empty files cannot be mapped and are returned as b''. Pipes, FIFOs and other files that are
+    not regular report no size and cannot be mapped either, so they are read into memory instead.
+
+    Parameters:
+        filename (str): The path to the input file.
+
+    Yields:
+        Buffer: The mapped file contents, or the bytes read from a file that cannot be mapped.
+    """
+    with open(filename, 'rb') as file:
+        info = os.fstat(file.fileno())
+        if not stat.S_ISREG(info.st_mode):
+            yield file.read()
+            return
+        if info.st_size == 0:
+            yield b''
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield mapped
+
+# Bytes copied out of a memory map at a time by the line-based parsers
+BLOCK_SIZE = 1 << 20
+# The blank line between two sections
+SECTION_BREAK_PATTERN = re.compile(rb"\r?\n[ \t\r]*\n")
+
+def as_bytes(data: Buffer) -> bytes:
+    """Return the whole buffer as bytes; this copies a memory map, so only use it when a full copy is wanted."""
+    return data if isinstance(data, bytes) else data[:]
+
+def line_blocks(data: Buffer, start: int = 0, stop: Optional[int] = None,
+                block_size: int = BLOCK_SIZE) -> Iterator[bytes]:
+    """
+    Cut a buffer into blocks of whole lines.
+
+    Each block is about block_size bytes and ends at a line break, so the fast bytes methods
+    (split, splitlines) can run on it while only one block of a memory map is copied at a time.
+
+    Parameters:
+        data (Buffer): The raw input.
+        start (int): The offset to start reading at.
+        stop (Optional[int]): The offset to stop reading at, or None for the end of the buffer.
+        block_size (int): The least number of bytes per block, except for the last one.
+
+    Yields:
+        bytes: The consecutive blocks of data[start:stop].
+    """
+    stop = len(data) if stop is None else stop
+    while start < stop:
+        end = start + block_size
+        end = stop if end >= stop else (data.find(b'\n', end, stop) + 1 or stop)
+        yield data[start:end]
+        start = end
+
+def int_columns(data: Buffer, columns: int) -> List[List[int]]:
+    """
+    Parse whitespace-separated integers laid out in a fixed number of columns.
+
+    Parameters:
+        data (Buffer): The raw input.
+        columns (int): The number of integers per line.
+
+    Returns:
+        List[List[int]]: One list of integers per column.
+
+    Raises:
+        ValueError: If a block of lines does not hold `columns` integers per non-blank line.
+    """
+    values = []
+    for block in line_blocks(data):
+        tokens = block.split()
+        lines = block.count(b'\n') + (not block.endswith(b'\n'))
+        if len(tokens) != columns * lines:
+            # Blank lines are allowed, so only count the others once the quick check fails
+            rows = [line.split() for line in block.splitlines() if line.strip()]
+            if len(tokens) != columns * len(rows):
+                bad = next((row for row in rows if len(row) != columns), rows[-1])
+                raise ValueError(f"Expected {columns} integers per line, got {len(bad)} in {b' '.join(bad)!r}")
+        values.extend(map(int, tokens))
+    return [values[i::columns] for i in range(columns)]
+
+def int_rows(data: Buffer, separator: Optional[bytes] = None, start: int = 0,
+             stop: Optional[int] = None) -> List[List[int]]:
+    """
+    Parse every line of the buffer as a row of integers; rows may have different lengths.
+
+    Parameters:
+        data (Buffer): The raw input.
+        separator (Optional[bytes]): The separator between integers, or None for any whitespace.
+        start (int): The offset to start reading at.
+        stop (Optional[int]): The offset to stop reading at, or None for the end of the buffer.
+
+    Returns:
+        List[List[int]]: The integers of each line; blank lines give empty rows.
+    """
+    return [list(map(int, line.split(separator))) if line.strip() else []
+            for block in line_blocks(data, start, stop)
+            for line in block.splitlines()]
+
+def section_spans(data: Buffer) -> List[Tuple[int, int]]:
+    """
+    Find the blocks of the buffer separated by blank lines.
+
+    Parameters:
+        data (Buffer): The raw input.
+
+    Returns:
+        List[Tuple[int,int]]: The (start, stop) offsets of each block, without the separating
+        blank lines, for use with the start and stop arguments of int_rows.
+    """
+    spans = []
+    start = 0
+    for match in SECTION_BREAK_PATTERN.finditer(data):
+        spans.append((start, match.start()))
+        start = match.end()
+    spans.append((start, len(data)))
+    return spans
+
+def byte_grid(data: Buffer) -> Tuple[bytes, int]:
+    """
+    Parse a grid of fixed-width lines into one flat bytes buffer.
+
+    Parameters:
+        data (Buffer): The raw input.
+
+    Returns:
+        Tuple[bytes, int]: The rows concatenated, and the number of columns.
+    """
+    lines = [line for block in line_blocks(data) for line in block.split()]
+    cols = len(lines[0]) if lines else 0
+    return b''.join(lines), cols
+
+def text_rows(data: Buffer) -> List[str]:
+    """
+    Decode the buffer into a list of stripped lines.
+
+    Parameters:
+        data (Buffer): The raw input.
+
+    Returns:
+        List[str]: The lines of the input.
+    """
+    # Blocks end at line breaks, so a multi-byte character is never cut in two
+    return [line.strip() for block in line_blocks(data) for line in block.decode().splitlines()]
+
+# Bytes handed to the array kernels at a time, which bounds their full-length temporaries
+ARRAY_BLOCK_SIZE = 1 << 22
+
+def _block_int_tokens(raw):
+    """Parse the non-negative integers in a uint8 array, folding in one digit position per array operation."""
+    import numpy as np
+
+    # Digit mask with a non-digit sentinel on both ends, so every number has a start and an end edge
+    is_digit = np.zeros(len(raw) + 2, dtype=bool)
+    is_digit[1:-1] = (raw >= ord('0')) & (raw <= ord('9'))
+    edges = np.flatnonzero(is_digit[1:] != is_digit[:-1])
+    starts = edges[0::2]
+    lengths = edges[1::2] - starts
+
+    values = np.zeros(len(starts), dtype=np.int64)
+    for k in range(int(lengths.max()) if len(lengths) else 0):
+        longer = lengths > k
+        values[longer] = values[longer] * 10 + (raw[starts[longer] + k] - ord('0'))
+    return values
+
+def parse_int_tokens(data: Buffer):
+    """
+    Parse all whitespace-separated non-negative integers in a buffer at once.
+
+    Every digit is folded into its number with one array operation per digit position, so there is
+    no per-line or per-number Python work. The buffer is handed to the kernel one block of lines
+    at a time, so its temporaries stay bounded however large the input is.
+
+    Requires NumPy.
+
+    Parameters:
+        data (Buffer): The raw input.
+
+    Returns:
+        numpy.ndarray: The integers in order of appearance, as int64.
+    """
+    import numpy as np
+
+    parts = [_block_int_tokens(np.frombuffer(block, dtype=np.uint8))
+             for block in line_blocks(data, block_size=ARRAY_BLOCK_SIZE)]
+    return np.concatenate(parts) if parts else np.zeros(0, dtype=np.int64)
+
+def parse_int_rows(data: Buffer):
+    """
+    Parse every line of the buffer as a row of integers into a ragged array representation.
+
+    Requires NumPy.
+
+    Parameters:
+        data (Buffer): The raw input.
+
+    Returns:
+        Tuple[numpy.ndarray, numpy.ndarray]: All integers as one int64 array, and the offsets at
+        which each line starts in it, with the total length appended at the end.
+    """
+    import numpy as np
+
+    value_parts = []
+    length_parts = []
+    # Blocks end at line breaks, so no line is split between two of them
+    for block in line_blocks(data, block_size=ARRAY_BLOCK_SIZE):
+        raw = np.frombuffer(block, dtype=np.uint8)
+        newline = raw == ord('\n')
+        lines = int(np.count_nonzero(newline)) + (1 if raw[-1] != ord('\n') else 0)
+
+        is_digit = (raw >= ord('0')) & (raw <= ord('9'))
+        # A number starts at a digit whose previous byte is not a digit
+        starts = is_digit.copy()
+        starts[1:] &= ~is_digit[:-1]
+        line_of_byte = np.cumsum(newline) - newline
+        length_parts.append(np.bincount(line_of_byte[starts], minlength=lines))
+        value_parts.append(_block_int_tokens(raw))
+
+    lengths = np.concatenate(length_parts) if length_parts else np.zeros(0, dtype=np.int64)
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    values = np.concatenate(value_parts) if value_parts else np.zeros(0, dtype=np.int64)
+    return values, offsets
@@ -0,0 +1,154 @@
+import atexit
+import cProfile
+import json
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from typing import ContextManager, Dict, Iterator, List, Optional
+
+# Set to '1' (or '-') to print a JSON report to stderr at exit, or to a file path to write it there
+ENV_VAR = 'AOC_INSTRUMENT'
+# Set to a file path to also dump cProfile statistics there at exit
+PROFILE_ENV_VAR = 'AOC_PROFILE'
+
+# Read by call sites that would otherwise do extra work just to feed a counter
+ENABLED = False
+
+_NO_PHASE = nullcontext()
+
+class Recorder:
+    """
+    Collects phase timings, peak memory and counters for one process.
+
+    Peak memory comes from tracemalloc, which is reset at the start of every phase. A phase
+    nested in another hands its peak up when it ends, so the outer phase still reports the
+    highest point reached anywhere inside it.
+    """
+
+    def __init__(self, profile: Optional[str] = None):
+        """
+        Parameters:
+            profile (Optional[str]): Where to dump cProfile statistics, or None to not profile.
+        """
+        self.phases: Dict[str, Dict[str, float]] = {}
+        self.counters: Dict[str, int] = {}
+        self._peaks: List[int] = []
+        self.profile = profile
+        self.profiler = cProfile.Profile() if profile else None
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        if self.profiler:
+            self.profiler.enable()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time the enclosed block under the given name, accumulating over repeated calls."""
+        if self._peaks:
+            self._peaks[-1] = max(self._peaks[-1], tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+        self._peaks.append(0)
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+            peak = max(self._peaks.pop(), tracemalloc.get_traced_memory()[1])
+            if self._peaks:
+                self._peaks[-1] = max(self._peaks[-1], peak)
+
+            stats = self.phases.setdefault(name, {'calls': 0, 'wall_seconds': 0.0, 'cpu_seconds': 0.0,
+                                                  'peak_traced_bytes': 0})
+            stats['calls'] += 1
+            stats['wall_seconds'] += wall
+            stats['cpu_seconds'] += cpu
+            stats['peak_traced_bytes'] = max(stats['peak_traced_bytes'], peak)
+
+    def count(self, name: str, amount: int = 1) -> None:
+        """Add to a named counter."""
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def reset(self) -> None:
+        """Forget the phases and counters recorded so far, e.g. between tasks run by one worker."""
+        self.phases = {}
+        self.counters = {}
+
+    def report(self) -> dict:
+        """Return everything recorded so far as a JSON-serialisable dictionary."""
+        return {'pid': os.getpid(), 'phases': self.phases, 'counters': self.counters}
+
+    def finish(self) -> None:
+        """Stop profiling and dump the profile, if one was requested."""
+        if self.profiler:
+            self.profiler.disable()
+            self.profiler.dump_stats(self.profile)
+            self.profiler = None
+
+recorder: Optional[Recorder] = None
+
+def enable(output: Optional[str] = '-', profile: Optional[str] = None) -> Recorder:
+    """
+    Turn instrumentation on for this process.
+
+    Parameters:
+        output (Optional[str]): Where to write the JSON report at exit: a file path, '-' for
+            stderr, or None to leave reporting to the caller.
+        profile (Optional[str]): Where to dump cProfile statistics at exit, or None to not profile.
+
+    Returns:
+        Recorder: The recorder that collects the measurements.
+    """
+    global ENABLED, recorder
+    if recorder is None:
+        recorder = Recorder(profile)
+        ENABLED = True
+        atexit.register(_finish, output)
+    return recorder
+
+def _finish(output: Optional[str]) -> None:
+    """Dump the profile and write the report; registered with atexit by enable()."""
+    recorder.finish()
+    if output is None:
+        return
+    if output == '-':
+        json.dump(recorder.report(), sys.stderr, indent=2)
+        sys.stderr.write('\n')
+    else:
+        with open(output, 'w') as file:
+            json.dump(recorder.report(), file, indent=2)
+
+def phase(name: str) -> ContextManager[None]:
+    """
+    Time a block of code as a named phase if instrumentation is on.
+
+    Parameters:
+        name (str): The phase name, e.g. 'day6.part2'.
+
+    Returns:
+        ContextManager[None]: The timing context, or a shared do-nothing context when off.
+    """
+    return recorder.phase(name) if recorder else _NO_PHASE
+
+def count(name: str, amount: int = 1) -> None:
+    """
+    Add to a named counter if instrumentation is on.
+
+    Call sites count once per call of the function being measured, never per loop iteration,
+    so that the counters cost nothing noticeable when instrumentation is off.
+
+    Parameters:
+        name (str): The counter name, e.g. 'day3.regex_matches'.
+        amount (int): The amount to add.
+    """
+    if recorder:
+        recorder.count(name, amount)
+
+def _enable_from_environment() -> None:
+    """Turn instrumentation on if the environment asks for it."""
+    output = os.environ.get(ENV_VAR)
+    profile = os.environ.get(PROFILE_ENV_VAR)
+    if output or profile:
+        enable(None if not output else '-' if output == '1' else output, profile)
+
+_enable_from_environment()
@@ -0,0 +1,299 @@
+import argparse
+import json
+import os
+import shutil
+import stat
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from types import ModuleType
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import Input
+import Instrument
+from Cache import DEFAULT_DIR, DEFAULT_MAX_BYTES, DIR_ENV_VAR, DiskCache, content_hash, solver_version
+from Input import data_path
+
+DAYS = (1, 2, 3, 4, 5, 6)
+PARTS = (1, 2)
+
+# A unit of work: the day, its input file, the parts to solve, whether to instrument it, and the
+# cache directory ('' for the default one) and size limit, or None if caching is off
+Task = Tuple[int, str, Tuple[int, ...], bool, Optional[str], int]
+
+class DaySolver(NamedTuple):
+    """How to solve a day: its modules, a parser, and solvers that take the parsed input."""
+    modules: Tuple[ModuleType, ...]
+    parse: Callable[[str], object]
+    # Computes both answers with one shared traversal
+    solve: Callable[[object], Tuple[int, int]]
+    # Cheaper solvers for runs that ask for a single part, where the day has one
+    parts: Dict[int, Callable[[object], int]] = {}
+    # Whether the parsed input is worth caching, rather than being quicker to redo than to load
+    cache_parsed: bool = True
+
+def _load_day1() -> DaySolver:
+    import Day1
+
+    return DaySolver((Day1, Input), Day1.read_lists_from_file, lambda lists: Day1.solve_lists(*lists), {
+        1: lambda lists: Day1.calculate_total_distance(*lists),
+        2: lambda lists: Day1.calculate_similarity_score(*lists),
+    })
+
+def _load_day2() -> DaySolver:
+    import Day2
+
+    return DaySolver((Day2, Input), Day2.read_reports_from_file, Day2.solve_reports, {
+        1: lambda reports: sum(map(Day2.is_safe_report, reports)),
+    })
+
+def _load_day3() -> DaySolver:
+    import Day3
+
+    # Both sums come out of one scan of the mapped file, so the scan stands in for parsing
+    return DaySolver((Day3, Input), Day3.solve, lambda sums: sums, cache_parsed=False)
+
+def _load_day4() -> DaySolver:
+    import Day4
+
+    return DaySolver((Day4, Input), Day4.read_grid_from_file, Day4.solve_grid, {
+        1: lambda grid: Day4.count_word_occurrences(grid, "XMAS"),
+        2: Day4.count_xmas_pattern,
+    })
+
+def _load_day5() -> DaySolver:
+    import Day5
+
+    return DaySolver((Day5, Input), Day5.parse_input, lambda parsed: Day5.solve_updates(*parsed), {
+        1: lambda parsed: Day5.part_one(*parsed),
+        2: lambda parsed: Day5.part_two(*parsed),
+    })
+
+def _load_day6() -> DaySolver:
+    import Day6
+
+    return DaySolver((Day6, Input), Day6.parse_input, lambda parsed: Day6.solve_patrol(*parsed), {
+        1: lambda parsed: Day6.simulate_patrol(*parsed)[0].count(1),
+    })
+
+# Each loader imports its day module on first use, so a run only loads the days it needs
+LOADERS: Dict[int, Callable[[], DaySolver]] = {
+    1: _load_day1,
+    2: _load_day2,
+    3: _load_day3,
+    4: _load_day4,
+    5: _load_day5,
+    6: _load_day6,
+}
+
+@lru_cache(maxsize=None)
+def load_solver(day: int) -> DaySolver:
+    """Import a day's module and return its DaySolver, once per process."""
+    return LOADERS[day]()
+
+def solve(day: int, filename: str, parts: Sequence[int], cache: Optional[DiskCache] = None) -> Dict[int, int]:
+    """
+    Solve parts of a day for one input file, parsing it at most once.
+
+    With a cache, answers already known for the same input contents and solver version are
+    returned without parsing, and a cached parse is reused for parts not answered yet.
+
+    Parameters:
+        day (int): The day number.
+        filename (str): The path to the input file.
+        parts (Sequence[int]): The parts to solve.
+        cache (Optional[DiskCache]): The cache to read and fill, or None.
+
+    Returns:
+        Dict[int,int]: The answer for each requested part.
+    """
+    solver = load_solver(day)
+    answers: Dict[int, int] = {}
+    if cache:
+        key = f"{content_hash(filename)}-day{day}-{solver_version(*solver.modules)}"
+        found, stored = cache.get(key + '-answers')
+        if found:
+            answers = stored
+        Instrument.count('cache.answer_hits' if found else 'cache.answer_misses')
+
+    missing = [part for part in parts if part not in answers]
+    if missing:
+        found, parsed = False, None
+        if cache and solver.cache_parsed:
+            found, parsed = cache.get(key + '-parsed')
+            Instrument.count('cache.parse_hits' if found else 'cache.parse_misses')
+        if not found:
+            parsed = solver.parse(filename)
+            if cache and solver.cache_parsed:
+                cache.put(key + '-parsed', parsed)
+
+        if len(missing) == 1 and missing[0] in solver.parts:
+            answers[missing[0]] = solver.parts[missing[0]](parsed)
+        else:
+            answers.update(zip(PARTS, solver.solve(parsed)))
+        if cache:
+            cache.put(key + '-answers', answers)
+
+    return {part: answers[part] for part in parts}
+
+@lru_cache(maxsize=None)
+def open_cache(directory: Optional[str], max_bytes: int) -> DiskCache:
+    """Return the DiskCache for a directory, once per process, so its size estimate carries across tasks."""
+    return DiskCache(directory, max_bytes)
+
+def run_task(task: Task) -> dict:
+    """
+    Solve the requested parts of one day for one input file.
+
+    Errors are caught and reported in the result, so one bad input does not stop a batch.
+
+    Parameters:
+        task (Task): The day, the input file, the parts to solve, whether to instrument the run,
+            and the cache settings.
+
+    Returns:
+        dict: The day, input, answers by part ('part1', 'part2'), elapsed seconds, and either
+        an 'error' message or, for instrumented runs, the 'instrumentation' report.
+    """
+    day, filename, parts, instrument, cache_dir, cache_size = task
+    if instrument:
+        Instrument.enable(None).reset()
+    cache = open_cache(cache_dir or None, cache_size) if cache_dir is not None else None
+
+    result = {'day': day, 'input': filename}
+    start = time.perf_counter()
+    try:
+        with Instrument.phase(f"day{day}.task"):
+            answers = solve(day, filename, parts, cache)
+        result.update((f"part{part}", answer) for part, answer in answers.items())
+    except Exception as error:
+        result['error'] = f"{type(error).__name__}: {error}"
+    result['seconds'] = time.perf_counter() - start
+
+    if instrument:
+        result['instrumentation'] = Instrument.recorder.report()
+    return result
+
+def run_tasks(tasks: List[Task], workers: int) -> List[dict]:
+    """
+    Run tasks across a process pool, returning their results in task order.
+
+    Parameters:
+        tasks (List[Task]): The tasks to run.
+        workers (int): Number of worker processes; 1 runs everything in this process.
+
+    Returns:
+        List[dict]: The result of each task, as returned by run_task.
+    """
+    if workers <= 1 or len(tasks) <= 1:
+        return [run_task(task) for task in tasks]
+    # Hand out tasks in chunks to cut the pickling round trips on large batches of small inputs
+    chunk_size = max(1, len(tasks) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(run_task, tasks, chunksize=chunk_size))
+
+def build_tasks(days: Sequence[int], parts: Sequence[int], inputs: Sequence[str], instrument: bool,
+                cache_dir: Optional[str] = None, cache_size: int = DEFAULT_MAX_BYTES) -> List[Task]:
+    """
+    Pair every chosen day with every input file, or with its bundled puzzle input if none are given.
+
+    Parameters:
+        days (Sequence[int]): The days to run.
+        parts (Sequence[int]): The parts to solve for each day.
+        inputs (Sequence[str]): Input file paths; empty to use the bundled inputs.
+        instrument (bool): Whether to instrument the runs.
+        cache_dir (Optional[str]): The cache directory, '' for the default one, or None to not cache.
+        cache_size (int): The cache's size limit in bytes.
+
+    Returns:
+        List[Task]: The tasks, grouped by day.
+    """
+    parts = tuple(sorted(set(parts)))
+    return [(day, filename, parts, instrument, cache_dir, cache_size)
+            for day in days
+            for filename in (inputs or [data_path(day)])]
+
+def format_text(results: List[dict]) -> str:
+    """
+    Format results as one line per answer.
+
+    Parameters:
+        results (List[dict]): The task results.
+
+    Returns:
+        str: The report.
+    """
+    lines = []
+    for result in results:
+        label = f"Day {result['day']} [{result['input']}]"
+        if 'error' in result:
+            lines.append(f"{label} Error: {result['error']}")
+            continue
+        for part in PARTS:
+            if f"part{part}" in result:
+                lines.append(f"{label} Part {part}: {result[f'part{part}']}")
+    return '\n'.join(lines)
+
+def _is_stream(filename: str) -> bool:
+    """Whether a path names a pipe, FIFO or device rather than a regular file or directory."""
+    try:
+        mode = os.stat(filename).st_mode
+    except OSError:
+        # Missing files are reported by the task that tries to read them
+        return False
+    return not stat.S_ISREG(mode) and not stat.S_ISDIR(mode)
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Run the chosen days on the given inputs; returns 1 if any of them failed."""
+    parser = argparse.ArgumentParser(description="Solve several days and inputs in one go.")
+    parser.add_argument('inputs', nargs='*',
+                        help="input files to run every chosen day on, '-' for stdin "
+                             "(default: each day's bundled input)")
+    parser.add_argument('--days', type=int, nargs='+', choices=DAYS, default=DAYS, help="days to run")
+    parser.add_argument('--parts', type=int, nargs='+', choices=PARTS, default=PARTS, help="parts to solve")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="worker processes (default: one per core)")
+    parser.add_argument('--format', choices=('text', 'json'), default='text', help="output format")
+    parser.add_argument('--instrument', action='store_true',
+                        help="add per-task phase timings and counters to the JSON results")
+    parser.add_argument('--cache', nargs='?', const='', metavar='DIR',
+                        help="reuse parsed inputs and answers across runs, stored in DIR "
+                             f"(default: ${DIR_ENV_VAR} or {DEFAULT_DIR})")
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024), metavar='MB',
+                        help="size the cache is trimmed back to")
+    args = parser.parse_args(argv)
+
+    # Workers cannot read this process's stdin, and a pipe can only be read once while every day
+    # (and the cache's content hash) reads each input, so streams are handed over as files
+    spool_directory = None
+    spooled: Dict[str, str] = {}
+    for filename in args.inputs:
+        if filename not in spooled and (filename == '-' or _is_stream(filename)):
+            spool_directory = spool_directory or tempfile.mkdtemp()
+            spooled[filename] = os.path.join(spool_directory, f"input{len(spooled)}.txt")
+            with open(spooled[filename], 'wb') as file:
+                if filename == '-':
+                    shutil.copyfileobj(sys.stdin.buffer, file)
+                else:
+                    with open(filename, 'rb') as stream:
+                        shutil.copyfileobj(stream, file)
+    inputs = [spooled.get(filename, filename) for filename in args.inputs]
+
+    try:
+        tasks = build_tasks(args.days, args.parts, inputs, args.instrument, args.cache, args.cache_size * 1024 * 1024)
+        results = run_tasks(tasks, args.workers)
+    finally:
+        if spool_directory:
+            shutil.rmtree(spool_directory)
+
+    given_names = {path: filename for filename, path in spooled.items()}
+    for result in results:
+        result['input'] = given_names.get(result['input'], result['input'])
+
+    print(json.dumps(results, indent=2) if args.format == 'json' else format_text(results))
+    return 1 if any('error' in result for result in results) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
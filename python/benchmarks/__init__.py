@@ -0,0 +1,6 @@
+"""
+Benchmarks for the daily solutions.
+
+Run from the python/ directory with `python -m benchmarks.runner --help`. The chunked and banded
+file scans can be checked against the in-memory solutions with `python -m benchmarks.check`.
+"""
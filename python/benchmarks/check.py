@@ -0,0 +1,108 @@
+import argparse
+import os
+import sys
+import tempfile
+from functools import reduce
+from typing import List, Optional, Sequence
+
+import Day3
+import Day4
+
+from benchmarks.generators import generate_day3, generate_day4
+
+def write_input(directory: str, text: str) -> str:
+    """Write an input to a file in directory and return its path."""
+    path = os.path.join(directory, 'input.txt')
+    with open(path, 'w') as file:
+        file.write(text)
+    return path
+
+def check_day3(directory: str, seed: int, cases: int, max_chunk: int) -> List[str]:
+    """
+    Compare the chunked Day 3 scans with sum_mul_instructions on the whole dump.
+
+    Tiny chunks make almost every instruction straddle a boundary, which exercises the carried
+    tail of sum_mul_instructions_from_file and the straddling match and summary merge of
+    summarize_chunk. The chunk summaries are merged in this process, as the parallel scan does.
+
+    Parameters:
+        directory (str): Where to write the generated dumps.
+        seed (int): The seed of the first generated dump.
+        cases (int): The number of dumps to generate.
+        max_chunk (int): The largest chunk size to try, in bytes.
+
+    Returns:
+        List[str]: One message per mismatch; empty if there are none.
+    """
+    failures = []
+    for case in range(seed, seed + cases):
+        text = generate_day3(1 + case % 40, case)
+        path = write_input(directory, text)
+        expected = Day3.sum_mul_instructions(text)
+        size = os.path.getsize(path)
+        for chunk_size in range(1, max_chunk + 1):
+            streamed = Day3.sum_mul_instructions_from_file(path, chunk_size)
+            summaries = [Day3.summarize_chunk(path, start, min(start + chunk_size, size))
+                         for start in range(0, size, chunk_size)]
+            summary = reduce(Day3.merge_summaries, summaries)
+            merged = (summary.total, summary.enabled_if_on)
+            for name, result in (('sum_mul_instructions_from_file', streamed), ('summarize_chunk', merged)):
+                if result != expected:
+                    failures.append(f"Day 3 {name} seed {case} chunk {chunk_size}: {result} != {expected}")
+    return failures
+
+def check_day4(directory: str, seed: int, cases: int, max_band: int) -> List[str]:
+    """
+    Compare the banded Day 4 counts with the in-memory counts on the whole grid.
+
+    Bands of a few rows put most matches across a band boundary, which exercises the halo rows
+    read below each band and the subtraction of the matches anchored in them.
+
+    Parameters:
+        directory (str): Where to write the generated grids.
+        seed (int): The seed of the first generated grid.
+        cases (int): The number of grids to generate.
+        max_band (int): The largest band height to try, in rows.
+
+    Returns:
+        List[str]: One message per mismatch; empty if there are none.
+    """
+    failures = []
+    for case in range(seed, seed + cases):
+        text = generate_day4(1 + case % 12, case)
+        path = write_input(directory, text)
+        grid = text.split()
+        expected_word = Day4.count_word_occurrences(grid, "XMAS")
+        expected_xmas = Day4.count_xmas_pattern(grid)
+        for band_rows in range(1, max_band + 1):
+            word = Day4.count_word_occurrences_in_file(path, "XMAS", band_rows)
+            xmas = Day4.count_xmas_pattern_in_file(path, band_rows)
+            if word != expected_word:
+                failures.append(f"Day 4 count_word_occurrences_in_file seed {case} band {band_rows}: "
+                                f"{word} != {expected_word}")
+            if xmas != expected_xmas:
+                failures.append(f"Day 4 count_xmas_pattern_in_file seed {case} band {band_rows}: "
+                                f"{xmas} != {expected_xmas}")
+    return failures
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Run the checks from the command line; returns 1 if any result differs."""
+    parser = argparse.ArgumentParser(
+        description="Check the chunked and banded file scans against the in-memory solutions.")
+    parser.add_argument('--seed', type=int, default=0, help="seed of the first generated input")
+    parser.add_argument('--cases', type=int, default=50, help="generated inputs per day")
+    parser.add_argument('--max-chunk', type=int, default=7, help="largest Day 3 chunk size to try, in bytes")
+    parser.add_argument('--max-band', type=int, default=3, help="largest Day 4 band height to try, in rows")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        failures = (check_day3(directory, args.seed, args.cases, args.max_chunk)
+                    + check_day4(directory, args.seed, args.cases, args.max_band))
+
+    for message in failures:
+        print("MISMATCH:", message, file=sys.stderr)
+    print(f"{len(failures)} mismatches")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
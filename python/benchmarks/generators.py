@@ -0,0 +1,138 @@
+import random
+from typing import Callable, Dict
+
+def generate_day1(size: int, seed: int = 0) -> str:
+    """
+    Generate a Day 1 input of two columns of five-digit location IDs.
+
+    Parameters:
+        size (int): The number of pairs.
+        seed (int): The random seed.
+
+    Returns:
+        str: The input text.
+    """
+    rng = random.Random(seed)
+    return ''.join(f"{rng.randint(10000, 99999)}   {rng.randint(10000, 99999)}\n" for _ in range(size))
+
+def generate_day2(size: int, seed: int = 0) -> str:
+    """
+    Generate a Day 2 input of reports that are mostly monotonic, with occasional bad levels.
+
+    Parameters:
+        size (int): The number of reports.
+        seed (int): The random seed.
+
+    Returns:
+        str: The input text.
+    """
+    rng = random.Random(seed)
+    lines = []
+    for _ in range(size):
+        direction = rng.choice((1, -1))
+        level = rng.randint(20, 80)
+        report = [level]
+        for _ in range(rng.randint(4, 7)):
+            # Mostly valid steps, with a few flat or oversized ones so every outcome shows up
+            step = rng.choice((1, 2, 3, 1, 2, 3, 1, 2, 0, 4, 5))
+            level += step * direction
+            report.append(level)
+        if rng.random() < 0.1:
+            report[rng.randrange(len(report))] = rng.randint(1, 99)
+        lines.append(' '.join(map(str, report)))
+    return '\n'.join(lines) + '\n'
+
+def generate_day3(size: int, seed: int = 0) -> str:
+    """
+    Generate a Day 3 corrupted memory dump with mul, do and don't instructions among junk.
+
+    Parameters:
+        size (int): The number of instructions and junk fragments.
+        seed (int): The random seed.
+
+    Returns:
+        str: The input text.
+    """
+    rng = random.Random(seed)
+    junk = ["why()", "what()", "where()", "from()", "who()", "select()", "%", "&", "[", "]", "^", "@",
+            "mul(", "mul[1,2]", "mul ( 2,4 )", "do(", "don't", ")", ",", "?", "'", "<", ">", "~"]
+    pieces = []
+    for _ in range(size):
+        roll = rng.random()
+        if roll < 0.45:
+            pieces.append(f"mul({rng.randint(1, 999)},{rng.randint(1, 999)})")
+        elif roll < 0.5:
+            pieces.append("do()")
+        elif roll < 0.55:
+            pieces.append("don't()")
+        else:
+            pieces.append(rng.choice(junk))
+    return ''.join(pieces) + '\n'
+
+def generate_day4(size: int, seed: int = 0) -> str:
+    """
+    Generate a Day 4 square letter grid over the letters X, M, A and S.
+
+    Parameters:
+        size (int): The side length of the grid.
+        seed (int): The random seed.
+
+    Returns:
+        str: The input text.
+    """
+    rng = random.Random(seed)
+    return ''.join(''.join(rng.choice('XMAS') for _ in range(size)) + '\n' for _ in range(size))
+
+def generate_day5(size: int, seed: int = 0, pages: int = 49) -> str:
+    """
+    Generate a Day 5 input: rules that totally order a set of pages, then updates of odd length.
+
+    About half of the updates are printed in the correct order and the rest are shuffled.
+
+    Parameters:
+        size (int): The number of updates.
+        seed (int): The random seed.
+        pages (int): The number of distinct page numbers, at most 90.
+
+    Returns:
+        str: The input text.
+    """
+    rng = random.Random(seed)
+    order = rng.sample(range(10, 100), pages)
+    rules = [f"{order[i]}|{order[j]}" for i in range(pages) for j in range(i + 1, pages)]
+    rng.shuffle(rules)
+
+    rank = {page: i for i, page in enumerate(order)}
+    updates = []
+    for _ in range(size):
+        update = rng.sample(order, rng.randrange(5, min(pages, 23) + 1, 2))
+        if rng.random() < 0.5:
+            update.sort(key=rank.__getitem__)
+        updates.append(','.join(map(str, update)))
+    return '\n'.join(rules) + '\n\n' + '\n'.join(updates) + '\n'
+
+def generate_day6(size: int, seed: int = 0, density: float = 0.02) -> str:
+    """
+    Generate a Day 6 square lab map with randomly placed obstacles and the guard facing up in the middle.
+
+    Parameters:
+        size (int): The side length of the map.
+        seed (int): The random seed.
+        density (float): The probability that a cell holds an obstacle.
+
+    Returns:
+        str: The input text.
+    """
+    rng = random.Random(seed)
+    rows = [['#' if rng.random() < density else '.' for _ in range(size)] for _ in range(size)]
+    rows[size // 2][size // 2] = '^'
+    return ''.join(''.join(row) + '\n' for row in rows)
+
+GENERATORS: Dict[int, Callable[..., str]] = {
+    1: generate_day1,
+    2: generate_day2,
+    3: generate_day3,
+    4: generate_day4,
+    5: generate_day5,
+    6: generate_day6,
+}
@@ -0,0 +1,207 @@
+import argparse
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import Day1
+import Day2
+import Day3
+import Day4
+import Day5
+import Day6
+
+from benchmarks.generators import GENERATORS
+
+Phases = Tuple[Callable[[str], object], Callable[[object], object], Callable[[object], object],
+               Callable[[object], object]]
+Results = Dict[str, Dict[str, Dict[str, float]]]
+
+PHASE_NAMES = ('parse', 'part1', 'part2', 'solve')
+
+# Size of the smallest generated input per day, in the units below
+BASE_SIZES = {1: 10000, 2: 10000, 3: 20000, 4: 50, 5: 2000, 6: 50}
+UNITS = {1: 'pairs', 2: 'reports', 3: 'fragments', 4: 'rows', 5: 'updates', 6: 'rows'}
+
+# The parse, part one and part two phases of each day, and the fused solve that its main() runs
+DAY_PHASES: Dict[int, Phases] = {
+    1: (Day1.read_lists_from_file,
+        lambda lists: Day1.calculate_total_distance(*lists),
+        lambda lists: Day1.calculate_similarity_score(*lists),
+        lambda lists: Day1.solve_lists(*lists)),
+    2: (Day2.read_reports_from_file,
+        lambda reports: sum(map(Day2.is_safe_report, reports)),
+        lambda reports: sum(map(Day2.is_safe_with_dampener, reports)),
+        Day2.solve_reports),
+    3: (Day3.read_memory_from_file,
+        Day3.extract_and_sum_mul_instructions,
+        Day3.extract_and_sum_mul_instructions_with_conditions,
+        Day3.sum_mul_instructions),
+    4: (Day4.read_grid_from_file,
+        lambda grid: Day4.count_word_occurrences(grid, "XMAS"),
+        Day4.count_xmas_pattern,
+        Day4.solve_grid),
+    5: (Day5.parse_input,
+        lambda parsed: Day5.part_one(*parsed),
+        lambda parsed: Day5.part_two(*parsed),
+        lambda parsed: Day5.solve_updates(*parsed)),
+    6: (Day6.parse_input,
+        lambda parsed: Day6.simulate_patrol(*parsed)[0].count(1),
+        lambda parsed: Day6.count_loop_obstructions(*parsed),
+        lambda parsed: Day6.solve_patrol(*parsed)),
+}
+
+def time_call(func: Callable[[], object], repeat: int) -> float:
+    """
+    Time a call, keeping the best of several runs.
+
+    Parameters:
+        func (Callable[[], object]): The call to time.
+        repeat (int): The number of runs.
+
+    Returns:
+        float: The fastest wall-clock time in seconds.
+    """
+    best = math.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def benchmark_day(day: int, sizes: Sequence[int], repeat: int, seed: int, directory: str,
+                  density: float) -> Dict[str, Dict[str, float]]:
+    """
+    Time the parse, part one, part two and fused solve phases of a day on generated inputs of several sizes.
+
+    Parameters:
+        day (int): The day number.
+        sizes (Sequence[int]): The input sizes to generate.
+        repeat (int): The number of runs per phase, of which the fastest counts.
+        seed (int): The random seed for the generators.
+        directory (str): Where to write the generated inputs.
+        density (float): The obstacle density of Day 6 maps.
+
+    Returns:
+        Dict[str, Dict[str, float]]: Seconds per phase and size, with sizes as string keys.
+    """
+    parse, part1, part2, solve = DAY_PHASES[day]
+    timings = {phase: {} for phase in PHASE_NAMES}
+    for size in sizes:
+        options = {'density': density} if day == 6 else {}
+        path = os.path.join(directory, f"Day{day}_{size}.txt")
+        with open(path, 'w') as file:
+            file.write(GENERATORS[day](size, seed, **options))
+
+        parsed = parse(path)
+        timings['parse'][str(size)] = time_call(lambda: parse(path), repeat)
+        timings['part1'][str(size)] = time_call(lambda: part1(parsed), repeat)
+        timings['part2'][str(size)] = time_call(lambda: part2(parsed), repeat)
+        timings['solve'][str(size)] = time_call(lambda: solve(parsed), repeat)
+        os.remove(path)
+    return timings
+
+def scaling_exponent(timings: Dict[str, float]) -> Optional[float]:
+    """
+    Estimate k in time ~ size^k by a least-squares fit on a log-log scale.
+
+    Parameters:
+        timings (Dict[str, float]): Seconds per size.
+
+    Returns:
+        Optional[float]: The fitted exponent, or None with fewer than two usable sizes.
+    """
+    points = [(math.log(int(size)), math.log(seconds)) for size, seconds in timings.items() if seconds > 0]
+    if len(points) < 2:
+        return None
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    spread = sum((x - mean_x) ** 2 for x, _ in points)
+    if spread == 0:
+        return None
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / spread
+
+def find_regressions(results: Results, baseline: Results, tolerance: float) -> List[str]:
+    """
+    Compare timings against a baseline and describe every phase that got slower.
+
+    Parameters:
+        results (Results): The current timings.
+        baseline (Results): The saved timings, in the same layout.
+        tolerance (float): The allowed slowdown, e.g. 0.2 for 20%.
+
+    Returns:
+        List[str]: One message per regression; empty if there are none.
+    """
+    regressions = []
+    for day, phases in results.items():
+        for phase, timings in phases.items():
+            for size, seconds in timings.items():
+                before = baseline.get(day, {}).get(phase, {}).get(size)
+                if before and seconds > before * (1 + tolerance):
+                    regressions.append(f"Day {day} {phase} size {size}: {before:.4f}s -> {seconds:.4f}s "
+                                       f"({seconds / before:.2f}x)")
+    return regressions
+
+def format_report(results: Results) -> str:
+    """
+    Lay the timings out as a text table with throughput and scaling exponents.
+
+    Parameters:
+        results (Results): The timings.
+
+    Returns:
+        str: The report.
+    """
+    lines = []
+    for day, phases in results.items():
+        unit = UNITS[int(day)]
+        for phase, timings in phases.items():
+            for size, seconds in timings.items():
+                rate = int(size) / seconds if seconds > 0 else math.inf
+                lines.append(f"Day {day} {phase:<5} size {int(size):>9}  {seconds:10.4f} s  {rate:14,.0f} {unit}/s")
+            exponent = scaling_exponent(timings)
+            if exponent is not None:
+                lines.append(f"Day {day} {phase:<5} scaling exponent {exponent:.2f}")
+    return '\n'.join(lines)
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Run the benchmark sweep from the command line; returns 1 if a regression was found."""
+    parser = argparse.ArgumentParser(description="Benchmark the daily solutions on generated inputs.")
+    parser.add_argument('--days', type=int, nargs='+', default=sorted(DAY_PHASES), help="days to benchmark")
+    parser.add_argument('--scales', type=float, nargs='+', default=[1, 2, 4, 8],
+                        help="multiples of each day's base input size to sweep over")
+    parser.add_argument('--repeat', type=int, default=3, help="runs per phase; the fastest counts")
+    parser.add_argument('--seed', type=int, default=0, help="seed for the input generators")
+    parser.add_argument('--density', type=float, default=0.02, help="obstacle density of Day 6 maps")
+    parser.add_argument('--json', action='store_true', help="print the timings as JSON")
+    parser.add_argument('--save-baseline', metavar='PATH', help="write the timings to a baseline file")
+    parser.add_argument('--baseline', metavar='PATH', help="compare against a saved baseline file")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="allowed slowdown against the baseline")
+    args = parser.parse_args(argv)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for day in args.days:
+            sizes = [max(1, round(BASE_SIZES[day] * scale)) for scale in args.scales]
+            results[str(day)] = benchmark_day(day, sizes, args.repeat, args.seed, directory, args.density)
+
+    print(json.dumps(results, indent=2) if args.json else format_report(results))
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as file:
+            json.dump(results, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = find_regressions(results, json.load(file), args.tolerance)
+        for message in regressions:
+            print("REGRESSION:", message, file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())